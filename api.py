@@ -1,17 +1,76 @@
+import time
+_import_started = time.perf_counter()
+
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.preprocessing import LogTransformer
-from src.model_loader import load_model
+from fastapi.concurrency import run_in_threadpool
+from src import stacked, xgb
 from src.stacked import router as stacked_router
 from src.xgb import router as xgb_router
 from src.doc import router as doc_router
+from src.shadow import router as shadow_router
+from src.drift import router as drift_router
+from src.admission import router as admission_router
+from src.prediction_log import prediction_log, router as prediction_log_router
+from src.ranking import router as ranking_router
+from src.risk_index import router as risk_index_router
+from src.streaming import router as streaming_router
+from src.sharding import sharded_scorer
+from src.tracing import TracingMiddleware, exporter as trace_exporter
+from src.profiling import ProfilingMiddleware, router as profiling_router
+from src.health import router as health_router, record_phase, run_startup
+
+# Heavy imports (pandas, sklearn, xgboost, lightgbm) and model loading happen
+# in run_startup, not at import time
+MODEL_LOADERS = {
+    'xgb': xgb.load,
+    'stacked': stacked.load
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    prediction_log.start()
+    # Started first so run_startup can wait for the workers to load their models
+    sharded_scorer.start({'xgb': xgb.MODEL_PATH, 'stacked': stacked.MODEL_PATH})
+    # Load in the background so /healthz answers at once; /readyz turns
+    # green when both models are loaded and warmed up
+    startup_thread = threading.Thread(
+        target=run_startup, args=(MODEL_LOADERS,), name='startup', daemon=True
+    )
+    startup_thread.start()
+    yield
+    await run_in_threadpool(sharded_scorer.stop)
+    # Flush the pending prediction log rows and traces before exiting
+    await run_in_threadpool(prediction_log.stop)
+    trace_exporter.flush()
+
 
 app = FastAPI(
     title="Fraud Detection API",
     description="API for detecting fraudulent electricity and gas consumption",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Per-stage request spans, sampled at TRACE_SAMPLE_RATE or by the caller's traceparent
+app.add_middleware(TracingMiddleware)
+# On-demand profiling of the next requests to a router (/debug/profile, needs PROFILING_TOKEN)
+app.add_middleware(ProfilingMiddleware)
+
 # Include the routers
 app.include_router(doc_router)
+app.include_router(health_router)
 app.include_router(stacked_router)
-app.include_router(xgb_router)
\ No newline at end of file
+app.include_router(xgb_router)
+app.include_router(shadow_router)
+app.include_router(drift_router)
+app.include_router(admission_router)
+app.include_router(prediction_log_router)
+app.include_router(ranking_router)
+app.include_router(risk_index_router)
+app.include_router(streaming_router)
+app.include_router(profiling_router)
+
+record_phase('import_app', time.perf_counter() - _import_started)
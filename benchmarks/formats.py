@@ -0,0 +1,135 @@
+"""
+Compare request/response throughput of JSON, MessagePack and Arrow IPC.
+
+Without --url, measures the codec work the API does per batch in-process:
+decoding the columnar request plus validation, and encoding the response.
+With --url, posts batches to a running server's /<model>/predict/batch.
+
+    python -m benchmarks.formats --rows 1 100 10000
+    python -m benchmarks.formats --rows 1000 --url http://127.0.0.1:8000 --model xgb
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import msgpack
+import numpy as np
+import pyarrow as pa
+import requests
+from starlette.requests import Request
+
+from src.columnar import validate_columns
+from src.formats import ARROW, JSON, MSGPACK, encode_response, read_payload
+from src.schema import FEATURE_COLUMNS
+
+FORMATS = [JSON, MSGPACK, ARROW]
+
+
+def make_batch(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    columns = {col: rng.integers(0, 5000, rows) for col in FEATURE_COLUMNS}
+    columns['consumption_level_1'] = rng.gamma(2.0, 200.0, rows).round(1)
+    columns['counter_coefficient'] = rng.choice([0.0, 1.0, 2.0], rows)
+    columns['creation_month'] = rng.integers(1, 13, rows)
+    return columns
+
+
+def encode_request(columns, media_type):
+    if media_type == ARROW:
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    as_lists = {col: values.tolist() for col, values in columns.items()}
+    if media_type == MSGPACK:
+        return msgpack.packb(as_lists)
+    return json.dumps(as_lists).encode()
+
+
+def fake_request(body, media_type):
+    """Minimal ASGI request so the server's own decode/encode paths are measured."""
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'headers': [
+            (b'content-type', media_type.encode()),
+            (b'accept', media_type.encode())
+        ]
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    return Request(scope, receive)
+
+
+def bench_in_process(rows, media_type, min_seconds=1.0):
+    columns = make_batch(rows)
+    body = encode_request(columns, media_type)
+    pred = (np.random.default_rng(0).random(rows) > 0.5).astype(int)
+    proba = np.random.default_rng(1).random(rows)
+
+    loop = asyncio.new_event_loop()
+    iterations = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        request = fake_request(body, media_type)
+        payload = loop.run_until_complete(read_payload(request))
+        validate_columns(payload)
+        response = encode_response(request, pred, proba)
+        iterations += 1
+    elapsed = time.perf_counter() - start
+    loop.close()
+
+    return {
+        'format': media_type,
+        'rows': rows,
+        'request_bytes': len(body),
+        'response_bytes': len(response.body),
+        'batches_per_sec': iterations / elapsed,
+        'rows_per_sec': iterations * rows / elapsed
+    }
+
+
+def bench_http(url, rows, media_type, min_seconds=5.0):
+    body = encode_request(make_batch(rows), media_type)
+    headers = {'Content-Type': media_type, 'Accept': media_type}
+    session = requests.Session()
+    iterations = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        response = session.post(url, data=body, headers=headers)
+        response.raise_for_status()
+        iterations += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'format': media_type,
+        'rows': rows,
+        'batches_per_sec': iterations / elapsed,
+        'rows_per_sec': iterations * rows / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 10000])
+    parser.add_argument('--url', default=None, help="Base URL of a running API")
+    parser.add_argument('--model', choices=['xgb', 'stacked'], default='xgb')
+    args = parser.parse_args()
+
+    print(f"{'format':<38} {'rows':>7} {'req B':>10} {'resp B':>10} {'batches/s':>11} {'rows/s':>12}")
+    for rows in args.rows:
+        for media_type in FORMATS:
+            if args.url:
+                r = bench_http(f"{args.url}/{args.model}/predict/batch", rows, media_type)
+                r['request_bytes'] = r['response_bytes'] = float('nan')
+            else:
+                r = bench_in_process(rows, media_type)
+            print(f"{r['format']:<38} {r['rows']:>7} {r['request_bytes']:>10} {r['response_bytes']:>10} "
+                  f"{r['batches_per_sec']:>11.1f} {r['rows_per_sec']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import numpy as np
+import requests
+
+# Same payload as the README curl example
+SAMPLE_PAYLOAD = {
+    "counter_number": 0,
+    "account_age_days": 0,
+    "new_index": 0,
+    "old_index": 0,
+    "consumption_level_1": 0,
+    "counter_coefficient": 0,
+    "client_catg": 0,
+    "invoice_year": 2015,
+    "creation_year": 0,
+    "creation_month": 6
+}
+
+
+def percentiles(latencies, points=(50, 90, 99)):
+    """Latency percentiles in milliseconds."""
+    if not latencies:
+        return {f"p{p}": None for p in points}
+    values = np.asarray(latencies) * 1000
+    return {f"p{p}": float(np.percentile(values, p)) for p in points}
+
+
+def wait_until_up(base_url, timeout=120):
+    """Wait until the API is ready: /readyz answers 200 once the models are loaded and warm."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/readyz", timeout=1).status_code == 200:
+                return True
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_closed_loop(url, payload=SAMPLE_PAYLOAD, concurrency=16, duration=20.0, warmup=2.0):
+    """
+    Hammer `url` from `concurrency` threads for `duration` seconds.
+
+    Requests finished during the warmup period are not counted.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker():
+        session = requests.Session()
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                break
+            try:
+                ok = session.post(url, json=payload, timeout=30).status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            done = time.perf_counter()
+            if done < measure_from:
+                continue
+            with lock:
+                if ok:
+                    latencies.append(done - sent)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput_rps': len(latencies) / duration,
+        **percentiles(latencies)
+    }
@@ -0,0 +1,238 @@
+"""
+Replay recorded prediction requests against a running API.
+
+Reads the Predict page's Data/History.csv (the FraudInput fields, the
+recorded prediction and probability %, and a timestamp) or the API's
+prediction log database, and posts each row to /<model>/predict. Requests go
+out at the recorded pacing divided by --speed (0 = as fast as --concurrency
+allows). Reports latency percentiles, how late requests left compared to
+the schedule, and whether the replayed predictions match the recorded ones.
+
+History.csv does not say which model made each prediction, so its scores
+are only compared when --recorded-model names it and it equals --model. The
+prediction log stores the model, and its rows are filtered by it.
+
+    python -m benchmarks.replay --history Data/History.csv --model xgb --recorded-model xgb --speed 10
+    python -m benchmarks.replay --history Data/predictions.db --model stacked --speed 0 --concurrency 8
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from benchmarks.load import percentiles, wait_until_up
+from src.schema import FEATURE_COLUMNS
+
+# Recorded probabilities are rounded to 0.1 %, as the API returns them
+PROBABILITY_TOLERANCE = 0.1
+MAX_EXAMPLES = 20
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def load_history(path, model=None, limit=None):
+    """
+    Recorded requests as a DataFrame of FraudInput fields plus timestamp
+    (epoch seconds), prediction and probability (%), in time order.
+    """
+    if path.endswith('.db'):
+        import sqlite3
+
+        query = f"SELECT timestamp, {', '.join(FEATURE_COLUMNS)}, prediction, probability FROM predictions"
+        params = ()
+        if model is not None:
+            query += " WHERE model = ?"
+            params = (model,)
+        with sqlite3.connect(path) as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        # The log stores probabilities in [0, 1]
+        df['probability'] = df['probability'] * 100
+    else:
+        df = pd.read_csv(path)
+        df['timestamp'] = pd.to_datetime(df['timestamp']).astype('int64') / 1e9
+    missing = [col for col in FEATURE_COLUMNS + ['timestamp'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {missing}")
+    df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    return df.head(limit) if limit else df
+
+
+def schedule(timestamps, speed, max_gap=None):
+    """Send offsets in seconds from the start: recorded gaps / speed, each capped at max_gap."""
+    if speed <= 0 or len(timestamps) == 0:
+        return np.zeros(len(timestamps))
+    gaps = np.diff(np.asarray(timestamps, dtype=float), prepend=timestamps[0]) / speed
+    if max_gap is not None:
+        gaps = np.minimum(gaps, max_gap)
+    return np.cumsum(np.maximum(gaps, 0))
+
+
+def _probability(value):
+    """The API's "84.2%" string as a float."""
+    return float(str(value).rstrip('%'))
+
+
+def compare(recorded, replayed, tolerance=PROBABILITY_TOLERANCE):
+    """Match report of replayed (prediction, probability %) against the recorded rows."""
+    has_prediction = 'prediction' in recorded.columns
+    has_probability = 'probability' in recorded.columns
+    checked = prediction_mismatches = probability_mismatches = mismatched_rows = 0
+    max_diff = 0.0
+    examples = []
+    for i, result in replayed.items():
+        if result is None:
+            continue
+        row = recorded.iloc[i]
+        checked += 1
+        mismatch = {}
+        if has_prediction and int(row['prediction']) != result['prediction']:
+            prediction_mismatches += 1
+            mismatch['prediction'] = [int(row['prediction']), result['prediction']]
+        if has_probability:
+            diff = abs(float(row['probability']) - result['probability'])
+            max_diff = max(max_diff, diff)
+            # Half a rounding step of slack on top of the tolerance
+            if diff > tolerance + 0.05:
+                probability_mismatches += 1
+                mismatch['probability'] = [round(float(row['probability']), 3), result['probability']]
+        if mismatch:
+            mismatched_rows += 1
+            if len(examples) < MAX_EXAMPLES:
+                examples.append({'row': int(i), **mismatch})
+    return {
+        'checked': checked,
+        'prediction_mismatches': prediction_mismatches,
+        'probability_mismatches': probability_mismatches,
+        'max_probability_diff': round(max_diff, 3),
+        'match_rate': round(1 - mismatched_rows / checked, 6) if checked else None,
+        'examples': examples
+    }
+
+
+def replay(history, url, speed=1.0, concurrency=8, max_gap=None, timeout=30, compare_scores=True):
+    """
+    Post every row of `history` to `url` on the schedule.
+
+    Up to `concurrency` requests are in flight; when all are busy, the
+    next requests leave late and the delay is reported as schedule lag.
+    Without `compare_scores` (recorded by another or an unknown model),
+    the match report is None.
+    """
+    offsets = schedule(history['timestamp'].to_numpy(), speed, max_gap)
+    payloads = history[FEATURE_COLUMNS].to_dict('records')
+    results = {}
+    latencies = []
+    lags = []
+    errors = {}
+    lock = threading.Lock()
+    sessions = threading.local()
+    slots = threading.Semaphore(concurrency)
+
+    def send(i, payload, due):
+        session = getattr(sessions, 'session', None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        sent = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=timeout)
+            done = time.perf_counter()
+            if response.status_code == 200:
+                body = response.json()
+                result = {'prediction': int(body['prediction']), 'probability': _probability(body['probability'])}
+                error = None
+            else:
+                result, error = None, f"HTTP {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            done = time.perf_counter()
+            result, error = None, type(e).__name__
+        finally:
+            slots.release()
+        with lock:
+            results[i] = result
+            lags.append(max(0.0, sent - due))
+            if error is None:
+                latencies.append(done - sent)
+            else:
+                errors[error] = errors.get(error, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, (payload, offset) in enumerate(zip(payloads, offsets)):
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            slots.acquire()
+            pool.submit(send, i, payload, due)
+    seconds = time.perf_counter() - start
+
+    return {
+        'requests': len(payloads),
+        'ok': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'recorded_seconds': round(float(history['timestamp'].iloc[-1] - history['timestamp'].iloc[0]), 3)
+        if len(history) else 0.0,
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds > 0 else None,
+        'latency_ms': percentiles(latencies, PERCENTILES),
+        'schedule_lag_ms': percentiles(lags, PERCENTILES),
+        'match': compare(history, results) if compare_scores else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', default='Data/History.csv', help="History.csv or a prediction log .db")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--model', choices=['xgb', 'stacked'], default='xgb')
+    parser.add_argument('--speed', type=float, default=1.0, help="Pacing speed-up (1 = recorded pacing, 0 = no pacing)")
+    parser.add_argument('--max-gap', type=float, default=None, help="Cap on the wait between two requests, in seconds")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--limit', type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument('--log-model', default=None,
+                        help="With a prediction log, replay only the rows this model scored (default: --model)")
+    parser.add_argument('--recorded-model', choices=['xgb', 'stacked'], default=None,
+                        help="Model that made the History.csv predictions; scores are compared only if it is --model")
+    parser.add_argument('--fail-on-mismatch', action='store_true',
+                        help="Exit with status 1 if any replayed prediction differs from the recorded one")
+    parser.add_argument('--output', default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    log_model = args.log_model or args.model
+    recorded_model = log_model if args.history.endswith('.db') else args.recorded_model
+    compare_scores = recorded_model == args.model
+    if not compare_scores:
+        if args.fail_on_mismatch:
+            parser.error("--fail-on-mismatch needs recordings made by --model (see --recorded-model)")
+        print(f"Recorded model is {recorded_model or 'unknown'}, not {args.model}: skipping the score comparison",
+              file=sys.stderr)
+
+    history = load_history(args.history, model=log_model, limit=args.limit)
+    if not wait_until_up(args.url):
+        sys.exit(f"API at {args.url} is not responding")
+
+    report = replay(
+        history, f"{args.url}/{args.model}/predict",
+        speed=args.speed,
+        concurrency=args.concurrency,
+        max_gap=args.max_gap,
+        compare_scores=compare_scores
+    )
+    report.update({'history': args.history, 'model': args.model, 'recorded_model': recorded_model, 'speed': args.speed})
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    match = report['match']
+    if args.fail_on_mismatch and (match['match_rate'] != 1 or report['errors']):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Generate synthetic client_train / invoice_train datasets shaped like the STEG data.
+
+Columns, value sets, date format (%d/%m/%Y) and the ~5.6% client fraud rate
+follow the real files; sizes scale from thousands to hundreds of millions of
+invoice rows. Clients are generated in chunks, each with its own seed
+derived from --seed and the chunk number, so the output is identical
+whatever the number of --jobs. Chunks are written in parallel as part files.
+
+    python -m benchmarks.steg_data --clients 135000 --output datasets/synthetic
+    python -m benchmarks.steg_data --clients 13500000 --format parquet --jobs 8 --output /data/steg_x100
+"""
+import os
+import time
+import shutil
+import argparse
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Shape of the real training data
+FRAUD_RATE = 0.0558
+INVOICES_PER_CLIENT = 33
+CLIENT_CATEGORIES = ([11, 12, 51], [0.957, 0.020, 0.023])
+# region -> disrict, with each region's share of clients
+REGIONS = {
+    101: 60, 103: 60, 104: 60, 105: 60, 106: 60, 107: 60,
+    206: 62, 301: 62, 302: 62, 303: 62, 304: 62, 305: 63, 306: 63, 307: 63,
+    308: 63, 309: 63, 310: 63, 311: 69, 312: 69, 313: 69, 371: 69, 372: 69, 379: 69, 399: 69
+}
+REGION_WEIGHTS = np.array([9, 6, 3, 4, 4, 5, 1, 2, 1, 3, 3, 1, 2, 4, 2, 2, 3, 5, 2, 4, 6, 3, 3, 1], dtype=float)
+TARIF_TYPES = {'ELEC': ([11, 10, 12, 14, 15], [0.85, 0.06, 0.04, 0.03, 0.02]),
+               'GAZ': ([40, 45], [0.93, 0.07])}
+COUNTER_CODES = {'ELEC': ([203, 207, 413, 5, 202], [0.40, 0.35, 0.15, 0.05, 0.05]),
+                 'GAZ': ([5, 420, 10, 483], [0.85, 0.08, 0.05, 0.02])}
+COUNTER_STATUE = ([0, 1, 5, 4, 3, 2], [0.955, 0.030, 0.010, 0.002, 0.002, 0.001])
+READING_REMARQUE = ([6, 8, 9, 7], [0.45, 0.37, 0.17, 0.01])
+COEFFICIENTS = ([1, 0, 3, 2, 10, 20, 30, 40, 50], [0.9990, 0.0004, 0.0002, 0.0001, 0.0001, 0.0001, 0.00005, 0.00003, 0.00002])
+MONTHS_NUMBER = ([4, 2, 6, 8, 12, 1], [0.89, 0.04, 0.03, 0.02, 0.01, 0.01])
+
+# Every date used, pre-formatted once; rows index into it by day offset
+DATE_ORIGIN = date(1977, 1, 1)
+DATE_STRINGS = np.array([
+    (DATE_ORIGIN + timedelta(days=i)).strftime('%d/%m/%Y')
+    for i in range((date(2020, 1, 1) - DATE_ORIGIN).days)
+])
+INVOICE_START = (date(2005, 1, 1) - DATE_ORIGIN).days
+LAST_DAY = len(DATE_STRINGS) - 1
+
+
+def _choice(rng, spec, size):
+    values, weights = spec
+    weights = np.asarray(weights, dtype=float)
+    return rng.choice(np.asarray(values), size=size, p=weights / weights.sum())
+
+
+def generate_chunk(chunk, first_client, n_clients, seed, invoices_per_client=INVOICES_PER_CLIENT,
+                   fraud_rate=FRAUD_RATE):
+    """Clients [first_client, first_client + n_clients) and their invoices, as Arrow tables."""
+    rng = np.random.default_rng(np.random.SeedSequence([seed, chunk]))
+    ids = np.char.add('train_Client_', np.arange(first_client, first_client + n_clients).astype(str))
+
+    regions = rng.choice(np.array(list(REGIONS)), size=n_clients, p=REGION_WEIGHTS / REGION_WEIGHTS.sum())
+    catg = _choice(rng, CLIENT_CATEGORIES, n_clients)
+    target = (rng.random(n_clients) < fraud_rate).astype(np.float64)
+    creation = rng.integers(0, LAST_DAY - 400, n_clients)
+    clients = pa.table({
+        'disrict': np.vectorize(REGIONS.get)(regions),
+        'client_id': ids,
+        'client_catg': catg,
+        'region': regions,
+        'creation_date': DATE_STRINGS[creation],
+        'target': target
+    })
+
+    # Invoice count per client is overdispersed, like the real histories
+    extra = max(invoices_per_client - 1, 0.01)
+    counts = rng.negative_binomial(2, 2 / (2 + extra), n_clients) + 1
+    n = int(counts.sum())
+    owner = np.repeat(np.arange(n_clients), counts)
+    seq = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts)
+    fraud = target[owner] == 1
+
+    counter_type = np.where(rng.random(n_clients) < 0.3, 'GAZ', 'ELEC')[owner]
+    is_gaz = counter_type == 'GAZ'
+    tarif = np.where(is_gaz, _choice(rng, TARIF_TYPES['GAZ'], n), _choice(rng, TARIF_TYPES['ELEC'], n))
+    code = np.where(is_gaz, _choice(rng, COUNTER_CODES['GAZ'], n), _choice(rng, COUNTER_CODES['ELEC'], n))
+    counter_number = rng.integers(0, 2_000_000, n_clients)[owner]
+
+    months = _choice(rng, MONTHS_NUMBER, n)
+    first_invoice = np.maximum(creation, INVOICE_START) + rng.integers(0, 365, n_clients)
+    day = first_invoice[owner] + seq * 120 + rng.integers(-10, 11, n)
+    day = np.clip(day, 0, LAST_DAY)
+
+    # Fraudsters under-report: lower and more erratic billed consumption
+    scale = np.where(fraud, 0.75, 1.0) * np.where(is_gaz, 0.6, 1.0)
+    sigma = np.where(fraud, 1.3, 1.0)
+    level_1 = np.minimum(rng.lognormal(5.4, sigma, n) * scale, 800 * months / 4).round()
+    level_1[rng.random(n) < 0.08] = 0
+    level_2 = np.where(rng.random(n) < 0.25, rng.lognormal(5.0, 1.0, n) * scale, 0).round()
+    level_3 = np.where(rng.random(n) < 0.05, rng.lognormal(5.5, 1.0, n) * scale, 0).round()
+    level_4 = np.where(rng.random(n) < 0.02, rng.lognormal(6.0, 1.2, n) * scale, 0).round()
+    old_index = rng.lognormal(9.0, 1.3, n).round()
+    new_index = old_index + level_1 + level_2 + level_3 + level_4
+
+    statue = _choice(rng, COUNTER_STATUE, n)
+    statue[fraud & (rng.random(n) < 0.03)] = 1
+    remarque = _choice(rng, READING_REMARQUE, n)
+    remarque[fraud & (rng.random(n) < 0.1)] = 9
+
+    invoices = pa.table({
+        'client_id': ids[owner],
+        'invoice_date': DATE_STRINGS[day],
+        'tarif_type': tarif,
+        'counter_number': counter_number,
+        'counter_statue': statue,
+        'counter_code': code,
+        'reading_remarque': remarque,
+        'counter_coefficient': _choice(rng, COEFFICIENTS, n),
+        'consommation_level_1': level_1.astype(np.int64),
+        'consommation_level_2': level_2.astype(np.int64),
+        'consommation_level_3': level_3.astype(np.int64),
+        'consommation_level_4': level_4.astype(np.int64),
+        'old_index': old_index.astype(np.int64),
+        'new_index': new_index.astype(np.int64),
+        'months_number': months,
+        'counter_type': counter_type
+    })
+    return clients, invoices
+
+
+def _write(table, path, fmt):
+    if fmt == 'parquet':
+        pq.write_table(table, path)
+    else:
+        pa_csv.write_csv(table, path, pa_csv.WriteOptions(quoting_style='none'))
+
+
+def write_chunk(chunk, first_client, n_clients, seed, output, fmt, invoices_per_client, fraud_rate):
+    start = time.perf_counter()
+    clients, invoices = generate_chunk(chunk, first_client, n_clients, seed, invoices_per_client, fraud_rate)
+    for name, table in (('client_train', clients), ('invoice_train', invoices)):
+        _write(table, os.path.join(output, name, f"part-{chunk:05d}.{fmt}"), fmt)
+    return clients.num_rows, invoices.num_rows, time.perf_counter() - start
+
+
+def merge_csv_parts(directory, path):
+    """Concatenate CSV part files into one file, keeping the first header only."""
+    parts = sorted(os.listdir(directory))
+    with open(path, 'wb') as out:
+        for i, part in enumerate(parts):
+            with open(os.path.join(directory, part), 'rb') as f:
+                if i > 0:
+                    f.readline()
+                shutil.copyfileobj(f, out, 16 * 1024 * 1024)
+    shutil.rmtree(directory)
+
+
+def generate(output, n_clients, chunk_clients=20000, seed=42, fmt='csv', jobs=None,
+             invoices_per_client=INVOICES_PER_CLIENT, fraud_rate=FRAUD_RATE, single_file=False):
+    for name in ('client_train', 'invoice_train'):
+        shutil.rmtree(os.path.join(output, name), ignore_errors=True)
+        os.makedirs(os.path.join(output, name))
+
+    chunks = [(i, first, min(chunk_clients, n_clients - first))
+              for i, first in enumerate(range(0, n_clients, chunk_clients))]
+    start = time.perf_counter()
+    client_rows = invoice_rows = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(write_chunk, i, first, size, seed, output, fmt, invoices_per_client, fraud_rate)
+            for i, first, size in chunks
+        ]
+        for future in futures:
+            c, n, _ = future.result()
+            client_rows += c
+            invoice_rows += n
+
+    if single_file and fmt == 'csv':
+        for name in ('client_train', 'invoice_train'):
+            merge_csv_parts(os.path.join(output, name), os.path.join(output, f"{name}.csv"))
+
+    seconds = time.perf_counter() - start
+    return {
+        'clients': client_rows,
+        'invoices': invoice_rows,
+        'chunks': len(chunks),
+        'seconds': round(seconds, 2),
+        'rows_per_sec': round((client_rows + invoice_rows) / seconds)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=135000, help="Number of clients (real data: ~135k)")
+    parser.add_argument('--invoices-per-client', type=float, default=INVOICES_PER_CLIENT)
+    parser.add_argument('--fraud-rate', type=float, default=FRAUD_RATE)
+    parser.add_argument('--chunk-clients', type=int, default=20000, help="Clients per chunk/part file")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--single-file', action='store_true', help="Merge CSV parts into client_train.csv / invoice_train.csv")
+    parser.add_argument('--jobs', type=int, default=None, help="Writer processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='datasets/synthetic')
+    args = parser.parse_args()
+
+    result = generate(
+        args.output, args.clients,
+        chunk_clients=args.chunk_clients,
+        seed=args.seed,
+        fmt=args.format,
+        jobs=args.jobs,
+        invoices_per_client=args.invoices_per_client,
+        fraud_rate=args.fraud_rate,
+        single_file=args.single_file
+    )
+    print(f"{result['clients']} clients, {result['invoices']} invoices in {result['chunks']} chunks: "
+          f"{result['seconds']}s ({result['rows_per_sec']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Search uvicorn worker count against per-model thread budgets.
+
+Each (workers, threads) pair starts a fresh API server, drives it with a
+closed-loop load and records throughput and p99. The best configuration is
+the highest throughput whose p99 stays under --target-p99-ms.
+
+    python -m benchmarks.tune_threads --model stacked --workers 1 2 4 --threads 1 2 4
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+from .load import run_closed_loop, wait_until_up
+
+
+def run_config(args, workers, threads):
+    env = dict(os.environ)
+    env.update({
+        'XGB_THREADS': str(threads),
+        'STACKED_THREADS': str(threads),
+        'NATIVE_THREADS': str(threads),
+        # stop libraries that ignore n_jobs from spawning one thread per core
+        'OMP_NUM_THREADS': str(threads)
+    })
+    cmd = [
+        sys.executable, '-m', 'uvicorn', 'api:app',
+        '--port', str(args.port), '--workers', str(workers), '--log-level', 'warning'
+    ]
+    server = subprocess.Popen(cmd, env=env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        if not wait_until_up(base_url):
+            return {'workers': workers, 'threads': threads, 'error': 'server did not start'}
+        result = run_closed_loop(
+            f"{base_url}/{args.model}/predict",
+            concurrency=args.concurrency,
+            duration=args.duration
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    return {'workers': workers, 'threads': threads, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', choices=['xgb', 'stacked'], default='stacked')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--target-p99-ms', type=float, default=100.0)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', default=None, help="Write all results as JSON")
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    results = []
+    for workers, threads in itertools.product(args.workers, args.threads):
+        if workers * threads > 2 * cpu_count:
+            # heavily oversubscribed, not worth measuring
+            continue
+        result = run_config(args, workers, threads)
+        results.append(result)
+        print(json.dumps(result))
+
+    eligible = [
+        r for r in results
+        if r.get('p99') is not None and r['p99'] <= args.target_p99_ms and r['errors'] == 0
+    ]
+    best = max(eligible, key=lambda r: r['throughput_rps']) if eligible else None
+
+    print(f"\n{'workers':>8} {'threads':>8} {'rps':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['workers']:>8} {r['threads']:>8} {r['error']}")
+            continue
+        p50 = r['p50'] if r['p50'] is not None else float('nan')
+        p99 = r['p99'] if r['p99'] is not None else float('nan')
+        print(f"{r['workers']:>8} {r['threads']:>8} {r['throughput_rps']:>10.1f} {p50:>10.2f} {p99:>10.2f}")
+
+    if best:
+        print(f"\nBest under p99 <= {args.target_p99_ms} ms: "
+              f"--workers {best['workers']} with XGB_THREADS=STACKED_THREADS={best['threads']}")
+    else:
+        print(f"\nNo configuration met p99 <= {args.target_p99_ms} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'best': best}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import json
 from PIL import Image
 import os
 from auth_util.auth import login_form, is_authenticated
+from src.tracing import CLIENT, root_span, span, traceparent_headers
 
 st.set_page_config(
     page_icon="🔮",
@@ -37,6 +38,13 @@ def save_prediction(data, result):
     else:
         df.to_csv(file_path, mode='a', header=False, index=False)
 
+def post_prediction(api_endpoint, data):
+    # Trace the request through the API when sampled (TRACE_SAMPLE_RATE)
+    with root_span('streamlit-app', 'predict_page.submit') as trace:
+        with span('api_request', kind=CLIENT, **{'http.url': api_endpoint}) as span_id:
+            response = requests.post(api_endpoint, json=data, headers=traceparent_headers(span_id))
+    return response, trace.trace_id if trace is not None else None
+
 def main():
     login_form()
     if is_authenticated():
@@ -112,7 +120,9 @@ def main():
 
                 api_endpoint = "http://localhost:8000/stacked/predict" if model_choice == "Stacked Model" else "http://localhost:8000/xgb/predict"
                 
-                response = requests.post(api_endpoint, json=data)
+                response, trace_id = post_prediction(api_endpoint, data)
+                if trace_id is not None:
+                    st.caption(f"Trace ID: {trace_id}")
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -0,0 +1,154 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, HTTPException, Request
+
+from .tracing import record_span
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Relative deadline for the request in milliseconds, e.g. X-Request-Deadline-Ms: 250
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+# Deadline applied when the header is absent (0 = wait as long as the queue allows)
+DEFAULT_DEADLINE_MS = float(os.getenv('ADMISSION_DEFAULT_DEADLINE_MS', 0))
+# Weight of the latest inference in the moving average of service time
+SERVICE_TIME_ALPHA = 0.2
+
+
+def _setting(name, key, default):
+    """Per-model setting, e.g. STACKED_MAX_CONCURRENT, falling back to MODEL_MAX_CONCURRENT."""
+    return int(os.getenv(f"{name.upper()}_{key}", os.getenv(f"MODEL_{key}", default)))
+
+
+class AdmissionController:
+    """
+    Caps concurrent inferences for one model behind a bounded wait queue.
+
+    Requests are rejected with 503 and Retry-After when the queue is full,
+    when the expected queue wait already exceeds their deadline, or when the
+    deadline passes while waiting.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.in_flight = 0
+        self.service_time = None
+        self.counters = {
+            'admitted': 0,
+            'shed_queue_full': 0,
+            'shed_deadline': 0,
+            'queue_wait_seconds_total': 0.0,
+            'queue_wait_seconds_max': 0.0
+        }
+
+    def _expected_wait(self):
+        if self.service_time is None or (self.in_flight < self.max_concurrent and self.waiting == 0):
+            return 0.0
+        return (self.waiting + 1) / self.max_concurrent * self.service_time
+
+    def _shed(self, reason):
+        self.counters[f'shed_{reason}'] += 1
+        retry_after = max(1, math.ceil(self._expected_wait()))
+        logger.warning(f"Shedding {self.name} request ({reason}), retry after {retry_after}s")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} model overloaded ({reason.replace('_', ' ')})",
+            headers={'Retry-After': str(retry_after)}
+        )
+
+    @staticmethod
+    def deadline_for(request):
+        """Absolute monotonic deadline from the request header, or None."""
+        value = request.headers.get(DEADLINE_HEADER) if request is not None else None
+        try:
+            budget_ms = float(value) if value is not None else DEFAULT_DEADLINE_MS
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{DEADLINE_HEADER} must be a number of milliseconds")
+        return time.monotonic() + budget_ms / 1000 if budget_ms > 0 else None
+
+    @asynccontextmanager
+    async def slot(self, request=None):
+        deadline = self.deadline_for(request)
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            self._shed('queue_full')
+        if deadline is not None and self.service_time is not None:
+            # would not finish even if admitted after the expected wait
+            if time.monotonic() + self._expected_wait() + self.service_time > deadline:
+                self._shed('deadline')
+
+        queued_at = time.monotonic()
+        queued_ns = time.time_ns()
+        self.waiting += 1
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - queued_at)
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._shed('deadline')
+        finally:
+            self.waiting -= 1
+
+        started = time.monotonic()
+        wait = started - queued_at
+        record_span('admission_wait', queued_ns, model=self.name)
+        self.counters['admitted'] += 1
+        self.counters['queue_wait_seconds_total'] += wait
+        self.counters['queue_wait_seconds_max'] = max(self.counters['queue_wait_seconds_max'], wait)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+            elapsed = time.monotonic() - started
+            self.service_time = elapsed if self.service_time is None else (
+                SERVICE_TIME_ALPHA * elapsed + (1 - SERVICE_TIME_ALPHA) * self.service_time
+            )
+
+    def saturated(self):
+        """True while every slot is busy or requests are waiting for one."""
+        return self.waiting > 0 or self.in_flight >= self.max_concurrent
+
+    def stats(self):
+        admitted = self.counters['admitted']
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'service_time_ms': self.service_time * 1000 if self.service_time is not None else None,
+            'queue_wait_ms_mean': self.counters['queue_wait_seconds_total'] / admitted * 1000 if admitted else None,
+            **self.counters
+        }
+
+
+admission = {
+    name: AdmissionController(
+        name,
+        max_concurrent=_setting(name, 'MAX_CONCURRENT', 4),
+        max_queue=_setting(name, 'MAX_QUEUE', 32)
+    )
+    for name in ('xgb', 'stacked')
+}
+
+# Router
+router = APIRouter(
+    prefix="/admission",
+    tags=["Monitoring"]
+)
+
+
+@router.get("/stats")
+async def admission_stats():
+    """
+    Concurrency, queue-wait and shed counts per model.
+    """
+    return {name: controller.stats() for name, controller in admission.items()}
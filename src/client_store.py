@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import logging
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STORE_PATH = 'datasets/partitioned'
+TABLES = ('clients', 'invoices')
+# Rows of both tables are spread over this many files by a hash of client_id
+N_BUCKETS = 64
+# Small row groups keep per-client reads short; their client_id min/max
+# statistics are what lookups use to skip the rest of the file
+ROW_GROUP_SIZE = 8192
+CHUNK_ROWS = 500_000
+# Read as text so every chunk and bucket gets the same schema
+STRING_COLUMNS = {
+    'client_id': str,
+    'creation_date': str,
+    'invoice_date': str,
+    'counter_statue': str
+}
+
+
+def bucket_of(client_ids, n_buckets=N_BUCKETS):
+    """Bucket number of each client_id (CRC32, stable across runs and platforms)."""
+    return np.fromiter(
+        (zlib.crc32(str(cid).encode()) % n_buckets for cid in client_ids),
+        dtype=np.int32, count=len(client_ids)
+    )
+
+
+def _bucket_path(root, table, bucket):
+    return os.path.join(root, table, f"bucket={bucket:04d}.parquet")
+
+
+def _stage(csv_path, staging, n_buckets, chunk_rows):
+    """Pass 1: split the CSV into per-bucket pieces, one chunk at a time."""
+    import pandas as pd
+
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_rows, dtype=STRING_COLUMNS)):
+        buckets = bucket_of(chunk['client_id'].to_numpy(), n_buckets)
+        for bucket, part in chunk.groupby(buckets, sort=False):
+            directory = os.path.join(staging, f"{bucket:04d}")
+            os.makedirs(directory, exist_ok=True)
+            part.to_parquet(os.path.join(directory, f"{i:05d}.parquet"), index=False)
+        rows += len(chunk)
+    return rows
+
+
+def _finalize(staging, root, table, n_buckets, row_group_size):
+    """Pass 2: sort each bucket by client_id and write it with small row groups."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.join(root, table), exist_ok=True)
+    schema = None
+    for bucket in range(n_buckets):
+        directory = os.path.join(staging, f"{bucket:04d}")
+        pieces = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        if pieces:
+            df = pd.concat([pd.read_parquet(os.path.join(directory, p)) for p in pieces], ignore_index=True)
+            # Stable sort keeps each client's rows in file order
+            df = df.sort_values('client_id', kind='stable')
+            data = pa.Table.from_pandas(df, preserve_index=False)
+            schema = schema or data.schema
+            data = data.cast(schema)
+        elif schema is not None:
+            data = schema.empty_table()
+        else:
+            continue
+        pq.write_table(data, _bucket_path(root, table, bucket), row_group_size=row_group_size)
+
+
+def ingest(clients_csv, invoices_csv, root=STORE_PATH, n_buckets=N_BUCKETS,
+           row_group_size=ROW_GROUP_SIZE, chunk_rows=CHUNK_ROWS):
+    """
+    Write client_train and invoice_train into the client-partitioned layout.
+
+    Both tables use the same buckets, so the rows of any client, and the
+    join of the two tables, are within one bucket file per table. Memory is
+    bounded by one CSV chunk in the first pass and one bucket in the second.
+    """
+    start = time.perf_counter()
+    meta = {'n_buckets': n_buckets, 'row_group_size': row_group_size, 'rows': {}}
+    for table, csv_path in zip(TABLES, (clients_csv, invoices_csv)):
+        staging = os.path.join(root, f"_staging_{table}")
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(os.path.join(root, table), ignore_errors=True)
+        meta['rows'][table] = _stage(csv_path, staging, n_buckets, chunk_rows)
+        _finalize(staging, root, table, n_buckets, row_group_size)
+        shutil.rmtree(staging, ignore_errors=True)
+        logger.info(f"Wrote {meta['rows'][table]} {table} rows into {n_buckets} buckets")
+
+    meta['ingest_seconds'] = round(time.perf_counter() - start, 2)
+    with open(os.path.join(root, '_meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class ClientStore:
+    """
+    Reader for the client-partitioned layout written by ingest().
+
+    Per-client lookups open one bucket file per table and read only the
+    row groups whose client_id range contains the client. Merged scans join
+    clients and invoices bucket by bucket, so the full join is never held
+    in memory.
+    """
+
+    def __init__(self, root=STORE_PATH):
+        with open(os.path.join(root, '_meta.json')) as f:
+            meta = json.load(f)
+        self.root = root
+        self.n_buckets = meta['n_buckets']
+        self.rows = meta['rows']
+        self._file = lru_cache(maxsize=2 * self.n_buckets)(self._open)
+
+    def _open(self, table, bucket):
+        import pyarrow.parquet as pq
+
+        path = _bucket_path(self.root, table, bucket)
+        return pq.ParquetFile(path) if os.path.isfile(path) else None
+
+    def _read_client(self, table, client_id, columns=None):
+        import pyarrow.compute as pc
+
+        parquet_file = self._file(table, int(bucket_of([client_id], self.n_buckets)[0]))
+        if parquet_file is None:
+            return None
+        metadata = parquet_file.metadata
+        key = parquet_file.schema_arrow.get_field_index('client_id')
+        row_groups = []
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(key).statistics
+            if stats is None or not stats.has_min_max or stats.min <= client_id <= stats.max:
+                row_groups.append(i)
+        if columns is not None and 'client_id' not in columns:
+            columns = ['client_id'] + list(columns)
+        data = parquet_file.read_row_groups(row_groups, columns=columns)
+        return data.filter(pc.equal(data['client_id'], client_id)).to_pandas()
+
+    def client(self, client_id):
+        """The client row (region, disrict, client_catg, creation_date, target), or None."""
+        df = self._read_client('clients', client_id)
+        if df is None or df.empty:
+            return None
+        return df.iloc[0].to_dict()
+
+    def invoices(self, client_id, columns=None):
+        """All invoices of one client, in file order."""
+        df = self._read_client('invoices', client_id, columns)
+        return df.reset_index(drop=True) if df is not None else None
+
+    def history(self, client_id):
+        """Client row and invoice history, as {'client': dict, 'invoices': DataFrame}."""
+        return {'client': self.client(client_id), 'invoices': self.invoices(client_id)}
+
+    def scan(self, table, columns=None):
+        """Yield one table bucket by bucket, as DataFrames."""
+        for bucket in range(self.n_buckets):
+            parquet_file = self._file(table, bucket)
+            if parquet_file is not None:
+                yield parquet_file.read(columns=columns).to_pandas()
+
+    def scan_merged(self, columns=None, how='inner', client_filters=None):
+        """
+        Yield the invoices joined with their client row, one bucket at a time.
+
+        Each chunk equals the notebook's pd.merge(invoices, clients, on='client_id')
+        restricted to that bucket's clients. `client_filters` ({column: values})
+        keeps only matching clients, dropping the other rows before the join;
+        with `columns`, only the columns needed are read from the files.
+        """
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        for bucket in range(self.n_buckets):
+            invoices = self._file('invoices', bucket)
+            clients = self._file('clients', bucket)
+            if invoices is None or clients is None:
+                continue
+            client_data = clients.read(columns=self._columns(clients, columns, client_filters))
+            for column, values in (client_filters or {}).items():
+                keep = pa.array(list(values)).cast(client_data[column].type)
+                client_data = client_data.filter(pc.is_in(client_data[column], keep))
+            if client_filters and how == 'inner' and client_data.num_rows == 0:
+                continue
+            invoice_data = invoices.read(columns=self._columns(invoices, columns))
+            if client_filters and how == 'inner':
+                invoice_data = invoice_data.filter(pc.is_in(invoice_data['client_id'], client_data['client_id']))
+            merged = pd.merge(invoice_data.to_pandas(), client_data.to_pandas(), on='client_id', how=how)
+            yield merged[columns] if columns is not None else merged
+
+    @staticmethod
+    def _columns(parquet_file, columns, extra=None):
+        """Columns of this file needed for `columns` (and filters), always with client_id."""
+        if columns is None:
+            return None
+        wanted = set(columns) | set(extra or ()) | {'client_id'}
+        return [name for name in parquet_file.schema_arrow.names if name in wanted]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write client/invoice CSVs into the client-partitioned layout")
+    parser.add_argument('--clients', default='datasets/client_train.csv')
+    parser.add_argument('--invoices', default='datasets/invoice_train.csv')
+    parser.add_argument('--output', default=STORE_PATH)
+    parser.add_argument('--buckets', type=int, default=N_BUCKETS)
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    meta = ingest(
+        args.clients, args.invoices, args.output,
+        n_buckets=args.buckets,
+        row_group_size=args.row_group_size,
+        chunk_rows=args.chunk_rows
+    )
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
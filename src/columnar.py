@@ -0,0 +1,145 @@
+import numpy as np
+from .schema import FEATURE_COLUMNS
+
+# field -> (type, minimum, maximum); None means unbounded.
+# Every field goes through log1p in the pipelines, so negatives are rejected.
+FIELD_SPECS = {
+    'counter_number': ('int', 0, None),
+    'account_age_days': ('int', 0, None),
+    'new_index': ('int', 0, None),
+    'old_index': ('int', 0, None),
+    'consumption_level_1': ('float', 0, None),
+    'counter_coefficient': ('float', 0, None),
+    'client_catg': ('int', 0, None),
+    'invoice_year': ('int', 0, None),
+    'creation_year': ('int', 0, None),
+    'creation_month': ('int', 1, 12)
+}
+
+# Cap on reported errors so a bad million-row batch doesn't produce a huge response
+MAX_ERRORS = 100
+
+# Request body description for the OpenAPI docs (the body is parsed by hand)
+COLUMNAR_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "required": FEATURE_COLUMNS,
+                    "properties": {
+                        field: {
+                            "type": "array",
+                            "items": {"type": "integer" if kind == 'int' else "number"}
+                        }
+                        for field, (kind, _, _) in FIELD_SPECS.items()
+                    }
+                },
+                "example": {field: [0] for field in FEATURE_COLUMNS}
+            }
+        }
+    }
+}
+
+
+class ColumnarValidationError(Exception):
+    """Raised with a list of FastAPI-style error dicts ({"loc", "msg", "type"})."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} validation errors")
+        self.errors = errors
+
+
+def _row_errors(field, mask, msg, error_type):
+    return [
+        {"loc": ["body", field, int(row)], "msg": msg, "type": error_type}
+        for row in np.flatnonzero(mask)[:MAX_ERRORS]
+    ]
+
+
+def _to_float(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def _validate_field(field, values, kind, minimum, maximum):
+    try:
+        arr = np.asarray(values, dtype=np.float64)
+        if arr.ndim != 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        # nested or non-numeric items: fall back to a scan to find the bad rows
+        arr = np.array([_to_float(v) for v in values], dtype=np.float64)
+
+    errors = _row_errors(field, ~np.isfinite(arr), "Input should be a valid number", "float_parsing")
+    finite = np.isfinite(arr)
+    if kind == 'int':
+        fractional = finite & (arr != np.floor(arr))
+        errors += _row_errors(
+            field, fractional,
+            "Input should be a valid integer, got a number with a fractional part",
+            "int_from_float"
+        )
+    if minimum is not None:
+        errors += _row_errors(
+            field, finite & (arr < minimum),
+            f"Input should be greater than or equal to {minimum}", "greater_than_equal"
+        )
+    if maximum is not None:
+        errors += _row_errors(
+            field, finite & (arr > maximum),
+            f"Input should be less than or equal to {maximum}", "less_than_equal"
+        )
+
+    if kind == 'int' and not errors:
+        arr = arr.astype(np.int64)
+    return arr, errors
+
+
+def validate_columns(payload):
+    """
+    Validate a columnar body where each FraudInput field maps to an array.
+
+    Arrays are lists, or numpy arrays when the body was Arrow IPC. Checks
+    run per column on numpy arrays rather than per row. Returns a dict
+    of field -> numpy array, or raises ColumnarValidationError with errors
+    located by field and row index.
+    """
+    if not isinstance(payload, dict):
+        raise ColumnarValidationError([{
+            "loc": ["body"],
+            "msg": "Input should be an object mapping each field to an array",
+            "type": "dict_type"
+        }])
+
+    errors = []
+    for field in FEATURE_COLUMNS:
+        if field not in payload:
+            errors.append({"loc": ["body", field], "msg": "Field required", "type": "missing"})
+        elif not isinstance(payload[field], (list, np.ndarray)):
+            errors.append({"loc": ["body", field], "msg": "Input should be a valid list", "type": "list_type"})
+    if errors:
+        raise ColumnarValidationError(errors)
+
+    lengths = {field: len(payload[field]) for field in FEATURE_COLUMNS}
+    n_rows = lengths[FEATURE_COLUMNS[0]]
+    mismatched = [field for field, length in lengths.items() if length != n_rows]
+    if mismatched:
+        raise ColumnarValidationError([
+            {
+                "loc": ["body", field],
+                "msg": f"Array has {lengths[field]} items, expected {n_rows} like '{FEATURE_COLUMNS[0]}'",
+                "type": "length_mismatch"
+            }
+            for field in mismatched
+        ])
+
+    columns = {}
+    for field, (kind, minimum, maximum) in FIELD_SPECS.items():
+        columns[field], field_errors = _validate_field(field, payload[field], kind, minimum, maximum)
+        errors += field_errors
+    if errors:
+        raise ColumnarValidationError(errors[:MAX_ERRORS])
+    return columns
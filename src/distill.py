@@ -0,0 +1,245 @@
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from .model_loader import load_model
+from .preprocessing import FEATURE_COLUMNS
+from .student import DistilledClassifier
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TEACHER_PATH = 'models/stacked_pipeline.joblib'
+STUDENT_PATH = 'models/stacked_student.joblib'
+
+
+def load_transfer_set(paths, augment=0, random_state=42):
+    """
+    Read the transfer set from CSV files holding the FraudInput columns.
+
+    `augment` extra rows are drawn by resampling each column independently,
+    which widens coverage of the input space beyond the observed rows. They
+    are appended after the real rows and flagged in the returned mask.
+    """
+    frames = [pd.read_csv(path) for path in paths]
+    df = pd.concat(frames, ignore_index=True)
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Transfer data is missing columns: {missing}")
+
+    target = df['target'].astype(int) if 'target' in df.columns else None
+    X = df[FEATURE_COLUMNS]
+    is_synthetic = np.zeros(len(X), dtype=bool)
+
+    if augment > 0:
+        rng = np.random.default_rng(random_state)
+        synthetic = pd.DataFrame({
+            col: rng.choice(X[col].to_numpy(), size=augment, replace=True)
+            for col in FEATURE_COLUMNS
+        })
+        X = pd.concat([X, synthetic], ignore_index=True)
+        if target is not None:
+            # synthetic rows have no ground truth
+            target = pd.concat([target, pd.Series([-1] * augment)], ignore_index=True)
+        is_synthetic = np.concatenate([is_synthetic, np.ones(augment, dtype=bool)])
+
+    return X, target, is_synthetic
+
+
+def expected_calibration_error(student_prob, teacher_prob, n_bins=10):
+    """Weighted mean gap between student and teacher probabilities per student bin."""
+    bins = np.minimum((student_prob * n_bins).astype(int), n_bins - 1)
+    ece = 0.0
+    for b in range(n_bins):
+        mask = bins == b
+        if mask.any():
+            ece += mask.mean() * abs(student_prob[mask].mean() - teacher_prob[mask].mean())
+    return float(ece)
+
+
+def fidelity_report(teacher_prob, student_prob, target=None):
+    teacher_pred = (teacher_prob > 0.5).astype(int)
+    student_pred = (student_prob > 0.5).astype(int)
+
+    report = {
+        'rows': int(len(teacher_prob)),
+        'agreement': float((teacher_pred == student_pred).mean()),
+        'mean_abs_prob_diff': float(np.abs(teacher_prob - student_prob).mean()),
+        'max_abs_prob_diff': float(np.abs(teacher_prob - student_prob).max()),
+        'ece_vs_teacher': expected_calibration_error(student_prob, teacher_prob)
+    }
+    # AUC of the student against the teacher's hard decisions
+    if len(np.unique(teacher_pred)) == 2:
+        report['auc_vs_teacher'] = float(roc_auc_score(teacher_pred, student_prob))
+    else:
+        report['auc_vs_teacher'] = None
+
+    if target is not None:
+        labelled = target >= 0
+        if len(np.unique(target[labelled])) == 2:
+            report['teacher_auc'] = float(roc_auc_score(target[labelled], teacher_prob[labelled]))
+            report['student_auc'] = float(roc_auc_score(target[labelled], student_prob[labelled]))
+    return report
+
+
+def profile_model(model, X, repeats=200):
+    """Single-row latency, batch throughput and footprint of a pipeline."""
+    row = X.iloc[[0]]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    size = buffer.tell()
+
+    buffer.seek(0)
+    start = time.perf_counter()
+    joblib.load(buffer)
+    load_seconds = time.perf_counter() - start
+
+    return {
+        'single_row_p50_ms': float(np.percentile(timings, 50) * 1000),
+        'single_row_p99_ms': float(np.percentile(timings, 99) * 1000),
+        'batch_rows_per_sec': float(len(X) / batch_seconds) if batch_seconds > 0 else None,
+        'serialized_bytes': int(size),
+        'load_seconds': float(load_seconds),
+        'resident_bytes': loaded_rss(buffer.getvalue())
+    }
+
+
+def _rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _load_rss(path):
+    # The first load pays for imports; the second copy's growth is the model itself.
+    # Both copies must stay referenced until the second reading.
+    first = joblib.load(path)
+    before = _rss_bytes()
+    second = joblib.load(path)
+    grown = _rss_bytes() - before
+    del first, second
+    return grown
+
+
+def loaded_rss(artifact):
+    """
+    Resident memory of one loaded copy of a serialized model.
+
+    Measured as RSS growth in a fresh process, which unlike tracemalloc also
+    counts the boosters' native allocations.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.joblib', delete=False) as f:
+        f.write(artifact)
+    try:
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            return int(pool.apply(_load_rss, (f.name,)))
+    finally:
+        os.remove(f.name)
+
+
+def distill(teacher, X, target=None, synthetic=None, test_size=0.2, random_state=42, **student_params):
+    """
+    Train a student pipeline on the teacher's soft probabilities.
+
+    The student reuses the teacher's fitted preprocessor, so it accepts the
+    same raw FraudInput columns. Fidelity and profiles are reported on
+    held-out real rows; held-out `synthetic` rows get a separate fidelity
+    report. Returns the student pipeline and a report.
+    """
+    if synthetic is None:
+        synthetic = np.zeros(len(X), dtype=bool)
+    logger.info(f"Scoring {len(X)} transfer rows with the teacher")
+    teacher_prob = teacher.predict_proba(X)[:, 1]
+
+    idx_train, idx_test = train_test_split(
+        np.arange(len(X)), test_size=test_size, random_state=random_state,
+        stratify=synthetic if synthetic.any() else None
+    )
+    preprocessor = teacher.named_steps['preprocessor']
+    X_train = preprocessor.transform(X.iloc[idx_train])
+
+    logger.info("Fitting student")
+    student_model = DistilledClassifier(random_state=random_state, **student_params)
+    student_model.fit(X_train, teacher_prob[idx_train])
+    student = Pipeline([
+        ('preprocessor', preprocessor),
+        ('model', student_model)
+    ])
+
+    idx_real = idx_test[~synthetic[idx_test]]
+    idx_synthetic = idx_test[synthetic[idx_test]]
+    X_test = X.iloc[idx_real]
+    student_prob = student.predict_proba(X_test)[:, 1]
+    target_test = target.to_numpy()[idx_real] if target is not None else None
+
+    report = {
+        'student_params': student_model.get_params(),
+        'fidelity': fidelity_report(teacher_prob[idx_real], student_prob, target_test),
+        'teacher_profile': profile_model(teacher, X_test),
+        'student_profile': profile_model(student, X_test)
+    }
+    if len(idx_synthetic):
+        synthetic_prob = student.predict_proba(X.iloc[idx_synthetic])[:, 1]
+        report['fidelity_synthetic'] = fidelity_report(teacher_prob[idx_synthetic], synthetic_prob)
+    return student, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the stacked model into a compact student")
+    parser.add_argument('--teacher', default=TEACHER_PATH)
+    parser.add_argument('--data', nargs='+', required=True, help="CSV files with the FraudInput columns")
+    parser.add_argument('--augment', type=int, default=0, help="Extra resampled rows for the transfer set")
+    parser.add_argument('--output', default=STUDENT_PATH)
+    parser.add_argument('--report', default=None, help="Report path (defaults next to the output)")
+    parser.add_argument('--n-estimators', type=int, default=200)
+    parser.add_argument('--max-depth', type=int, default=4)
+    parser.add_argument('--learning-rate', type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    teacher = load_model(args.teacher)
+    X, target, synthetic = load_transfer_set(args.data, augment=args.augment)
+
+    student, report = distill(
+        teacher, X, target, synthetic,
+        n_estimators=args.n_estimators,
+        max_depth=args.max_depth,
+        learning_rate=args.learning_rate
+    )
+    joblib.dump(student, args.output)
+    logger.info(f"Saved student to {args.output}")
+
+    report_path = args.report or args.output.rsplit('.', 1)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
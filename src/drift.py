@@ -0,0 +1,344 @@
+import os
+import json
+import math
+import time
+import logging
+import queue
+import argparse
+import threading
+from collections import deque
+
+import numpy as np
+from fastapi import APIRouter, Query
+
+from .schema import FEATURE_COLUMNS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DRIFT_REFERENCE_PATH = os.getenv('DRIFT_REFERENCE_PATH', 'models/drift_reference.json')
+# Live data is aggregated into time slots; the window queried is a number of slots
+DRIFT_SLOT_SECONDS = int(os.getenv('DRIFT_SLOT_SECONDS', 600))
+DRIFT_SLOTS = int(os.getenv('DRIFT_SLOTS', 144))
+# Rows waiting to be observed; batches arriving when this is reached are dropped
+DRIFT_QUEUE_ROWS = int(os.getenv('DRIFT_QUEUE_ROWS', 1_000_000))
+# Larger batches are observed through a uniform sample of this many rows
+DRIFT_MAX_BATCH_ROWS = int(os.getenv('DRIFT_MAX_BATCH_ROWS', 100_000))
+
+# Probability outputs always use fixed bins so models can be compared
+PROBABILITY_EDGES = np.linspace(0.1, 0.9, 9)
+# Proportion floor so empty bins don't make PSI infinite
+PSI_EPSILON = 1e-4
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+class QuantileSketch:
+    """
+    Mergeable log-bucket quantile sketch (DDSketch-style).
+
+    Values are counted in buckets whose width grows geometrically, giving
+    quantiles within `relative_accuracy`. At most `max_bins` buckets are
+    kept per sign; beyond that the smallest-magnitude buckets are folded
+    together, so memory does not grow with the number of values.
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy=0.02, max_bins=128):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.count += len(values)
+        self.zero_count += int((np.abs(values) < self.MIN_VALUE).sum())
+        for store, magnitudes in ((self.positive, values[values >= self.MIN_VALUE]),
+                                  (self.negative, -values[values <= -self.MIN_VALUE])):
+            if len(magnitudes):
+                keys = np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+                keys, counts = np.unique(keys, return_counts=True)
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    store[key] = store.get(key, 0) + count
+                self._collapse(store)
+
+    def merge(self, other):
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+            self._collapse(store)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _collapse(self, store):
+        if len(store) > self.max_bins:
+            keys = sorted(store)
+            folded = keys[:len(store) - self.max_bins + 1]
+            store[folded[-1]] = sum(store.pop(key) for key in folded)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+
+def bin_counts(values, edges):
+    """Counts over len(edges) + 1 fixed bins split at `edges`."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+
+def psi(reference, current):
+    reference = np.maximum(reference, PSI_EPSILON)
+    current = np.maximum(current, PSI_EPSILON)
+    return float(np.sum((current - reference) * np.log(current / reference)))
+
+
+def ks(reference, current):
+    """KS distance between the binned distributions (evaluated at bin edges)."""
+    return float(np.max(np.abs(np.cumsum(reference) - np.cumsum(current))))
+
+
+class DriftMonitor:
+    """
+    Streaming per-field and per-model-output distributions for drift checks.
+
+    Each time slot holds a fixed-bin histogram (bins from the reference) and
+    a quantile sketch per stream. Slots form a ring of DRIFT_SLOTS entries,
+    so memory is constant whatever the traffic; a query merges the slots
+    inside the requested window and compares them with the reference.
+
+    Requests only queue their batch; a background thread updates the
+    histograms and sketches, so the event loop never waits on them. The
+    queue is bounded in rows and very large batches are subsampled.
+    """
+
+    def __init__(self, reference=None, slot_seconds=DRIFT_SLOT_SECONDS, slots=DRIFT_SLOTS,
+                 queue_rows=DRIFT_QUEUE_ROWS, max_batch_rows=DRIFT_MAX_BATCH_ROWS):
+        self.reference = reference or {}
+        self.slot_seconds = slot_seconds
+        self.slots = deque(maxlen=slots)
+        self.lock = threading.Lock()
+        self.queue_rows = queue_rows
+        self.max_batch_rows = max_batch_rows
+        self.batches = queue.Queue()
+        # Guards the row accounting only, so callers never wait on an update in progress
+        self.pending_lock = threading.Lock()
+        self.pending_rows = 0
+        self.dropped_rows = 0
+        self.worker = None
+
+    def _edges(self, stream):
+        if stream.startswith('probability:'):
+            return PROBABILITY_EDGES
+        ref = self.reference.get(stream)
+        return np.asarray(ref['edges']) if ref else None
+
+    def _slot(self, now):
+        start = int(now // self.slot_seconds) * self.slot_seconds
+        if not self.slots or self.slots[-1][0] != start:
+            self.slots.append((start, {}))
+        return self.slots[-1][1]
+
+    def _update(self, streams, stream, values):
+        entry = streams.get(stream)
+        if entry is None:
+            edges = self._edges(stream)
+            counts = np.zeros(len(edges) + 1, dtype=np.int64) if edges is not None else None
+            entry = streams[stream] = {'counts': counts, 'sketch': QuantileSketch()}
+        if entry['counts'] is not None:
+            entry['counts'] += bin_counts(values, self._edges(stream))
+        entry['sketch'].add(values)
+
+    def observe(self, model, df, proba):
+        """Queue one scored request or batch for observation; never blocks the caller."""
+        proba = np.atleast_1d(proba)
+        n_rows = len(proba)
+        if n_rows > self.max_batch_rows:
+            sample = np.random.default_rng().choice(n_rows, self.max_batch_rows, replace=False)
+            df, proba, n_rows = df.iloc[sample], proba[sample], self.max_batch_rows
+        with self.pending_lock:
+            if self.pending_rows + n_rows > self.queue_rows:
+                self.dropped_rows += n_rows
+                return
+            self.pending_rows += n_rows
+        self._ensure_worker()
+        self.batches.put((time.time(), model, df, proba))
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            with self.pending_lock:
+                if self.worker is None or not self.worker.is_alive():
+                    self.worker = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+                    self.worker.start()
+
+    def _run(self):
+        while True:
+            now, model, df, proba = self.batches.get()
+            try:
+                self._observe(now, model, df, proba)
+            except Exception as e:
+                logger.error(f"Drift observation failed: {str(e)}")
+            finally:
+                with self.pending_lock:
+                    self.pending_rows -= len(proba)
+                self.batches.task_done()
+
+    def _observe(self, now, model, df, proba):
+        columns = {
+            field: df[field].to_numpy(dtype=np.float64) for field in FEATURE_COLUMNS if field in df.columns
+        }
+        with self.lock:
+            streams = self._slot(now)
+            for field, values in columns.items():
+                self._update(streams, field, values)
+            self._update(streams, f"probability:{model}", proba)
+
+    def flush(self):
+        """Wait until every queued batch has been observed."""
+        if self.worker is not None:
+            self.batches.join()
+
+    def report(self, window_minutes=60):
+        since = time.time() - window_minutes * 60
+        merged = {}
+        with self.lock:
+            for start, streams in self.slots:
+                if start + self.slot_seconds < since:
+                    continue
+                for stream, entry in streams.items():
+                    total = merged.get(stream)
+                    if total is None:
+                        counts = entry['counts'].copy() if entry['counts'] is not None else None
+                        total = merged[stream] = {'counts': counts, 'sketch': QuantileSketch()}
+                    elif entry['counts'] is not None:
+                        total['counts'] += entry['counts']
+                    total['sketch'].merge(entry['sketch'])
+
+        result = {}
+        for stream, total in sorted(merged.items()):
+            sketch = total['sketch']
+            summary = {
+                'count': sketch.count,
+                'quantiles': {f"p{int(q * 100)}": sketch.quantile(q) for q in QUANTILES},
+                'psi': None,
+                'ks': None
+            }
+            ref = self.reference.get(stream)
+            counts = total['counts']
+            if ref is not None and counts is not None and counts.sum() > 0:
+                current = counts / counts.sum()
+                reference = np.asarray(ref['proportions'])
+                summary['psi'] = psi(reference, current)
+                summary['ks'] = ks(reference, current)
+            result[stream] = summary
+
+        return {
+            'window_minutes': window_minutes,
+            'slot_seconds': self.slot_seconds,
+            'reference_loaded': bool(self.reference),
+            'pending_rows': self.pending_rows,
+            'dropped_rows': self.dropped_rows,
+            'streams': result
+        }
+
+
+def build_reference(df, model_probas=None, n_bins=10):
+    """
+    Reference bins and proportions from training data.
+
+    Input fields are split at their deciles; model outputs use the fixed
+    probability bins. `model_probas` maps model name -> probabilities.
+    """
+    reference = {}
+    for field in FEATURE_COLUMNS:
+        values = df[field].to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = bin_counts(values, edges)
+        reference[field] = {'edges': edges.tolist(), 'proportions': (counts / counts.sum()).tolist()}
+    for model, proba in (model_probas or {}).items():
+        counts = bin_counts(proba, PROBABILITY_EDGES)
+        reference[f"probability:{model}"] = {
+            'edges': PROBABILITY_EDGES.tolist(),
+            'proportions': (counts / counts.sum()).tolist()
+        }
+    return reference
+
+
+def load_reference(path=DRIFT_REFERENCE_PATH):
+    if not os.path.isfile(path):
+        logger.warning(f"No drift reference at {path}; serving quantiles without PSI/KS")
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+drift_monitor = DriftMonitor(load_reference())
+
+# Router
+router = APIRouter(
+    prefix="/monitor",
+    tags=["Monitoring"]
+)
+
+
+@router.get("/drift")
+async def drift(window_minutes: int = Query(60, ge=1)):
+    """
+    Drift of live inputs and predicted probabilities against the training reference.
+
+    Returns PSI and KS per input field and per model output over the last
+    `window_minutes`, plus streaming quantiles.
+    """
+    return drift_monitor.report(window_minutes)
+
+
+def main():
+    import pandas as pd
+    from .model_loader import load_model
+
+    parser = argparse.ArgumentParser(description="Build the drift reference from training data")
+    parser.add_argument('--data', required=True, help="CSV with the FraudInput columns")
+    parser.add_argument('--output', default=DRIFT_REFERENCE_PATH)
+    parser.add_argument('--xgb-model', default='models/xgb_pipeline.joblib')
+    parser.add_argument('--stacked-model', default='models/stacked_pipeline.joblib')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    df = pd.read_csv(args.data)[FEATURE_COLUMNS]
+    model_probas = {}
+    for name, path in (('xgb', args.xgb_model), ('stacked', args.stacked_model)):
+        if path and os.path.isfile(path):
+            model_probas[name] = load_model(path).predict_proba(df)[:, 1]
+
+    with open(args.output, 'w') as f:
+        json.dump(build_reference(df, model_probas), f, indent=2)
+    logger.info(f"Wrote drift reference for {len(df)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
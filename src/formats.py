@@ -0,0 +1,156 @@
+import logging
+
+import numpy as np
+from fastapi import HTTPException, Request, Response
+
+from .scoring import batch_response
+
+# Optional binary formats; JSON always works without them
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JSON = 'application/json'
+ARROW = 'application/vnd.apache.arrow.stream'
+# Arrow IPC file format: accepted as a request body, answered as a stream
+ARROW_FILE = 'application/vnd.apache.arrow.file'
+MSGPACK = 'application/x-msgpack'
+
+# Accepted spellings of each media type
+MEDIA_TYPES = {
+    JSON: JSON,
+    ARROW: ARROW,
+    ARROW_FILE: ARROW,
+    MSGPACK: MSGPACK,
+    'application/msgpack': MSGPACK,
+    'application/vnd.msgpack': MSGPACK
+}
+
+
+def _arrow():
+    """pyarrow imported on first use, since it is slow to import; None if not installed."""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _essence(header):
+    """'Application/JSON; charset=utf-8' -> 'application/json'"""
+    return header.split(';')[0].strip().lower()
+
+
+def _media_type(header):
+    """Map a Content-Type/Accept entry to one of our formats, ignoring parameters."""
+    return MEDIA_TYPES.get(_essence(header))
+
+
+def _quality(entry):
+    """q parameter of an Accept entry (1 when absent or malformed)."""
+    for param in entry.split(';')[1:]:
+        key, _, value = param.partition('=')
+        if key.strip().lower() == 'q':
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def _require(module, name, package):
+    if module is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"{name} is not available on this server (install {package})"
+        )
+
+
+async def read_payload(request: Request):
+    """
+    Decode a columnar batch body according to its Content-Type.
+
+    JSON and MessagePack bodies are maps of field -> list; Arrow IPC bodies
+    (stream or file format) have their columns returned as numpy arrays.
+    """
+    content_type = request.headers.get('content-type', JSON)
+    media_type = _media_type(content_type)
+    if media_type is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Type: {content_type}")
+
+    body = await request.body()
+    try:
+        if media_type == ARROW:
+            pa = _arrow()
+            _require(pa, "Apache Arrow", "pyarrow")
+            if _essence(content_type) == ARROW_FILE:
+                table = pa.ipc.open_file(pa.py_buffer(body)).read_all()
+            else:
+                table = pa.ipc.open_stream(body).read_all()
+            return {
+                name: table.column(name).to_numpy(zero_copy_only=False)
+                for name in table.column_names
+            }
+        if media_type == MSGPACK:
+            _require(msgpack, "MessagePack", "msgpack")
+            return msgpack.unpackb(body)
+        return await request.json()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"Could not decode {media_type} body: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Request body is not valid {media_type}")
+
+
+def negotiate(request: Request):
+    """
+    Pick the response format from the Accept header, falling back to JSON.
+
+    Entries are tried by decreasing q-value (header order breaks ties);
+    q=0 entries and formats whose library is missing are skipped.
+    """
+    entries = [entry for entry in request.headers.get('accept', JSON).split(',') if entry.strip()]
+    for entry in sorted(entries, key=_quality, reverse=True):
+        if _quality(entry) <= 0 or _essence(entry) == ARROW_FILE:
+            continue
+        media_type = _media_type(entry)
+        if media_type == ARROW and _arrow() is not None:
+            return ARROW
+        if media_type == MSGPACK and msgpack is not None:
+            return MSGPACK
+        if media_type == JSON:
+            return JSON
+    return JSON
+
+
+def encode_response(request: Request, pred, proba):
+    """
+    Encode batch results in the negotiated format.
+
+    Binary formats carry unrounded numeric percentages; JSON keeps the
+    batch_response layout.
+    """
+    media_type = negotiate(request)
+    if media_type == JSON:
+        return batch_response(pred, proba)
+
+    prediction = pred.astype(np.int8)
+    probability = proba.astype(np.float64) * 100
+    if media_type == ARROW:
+        pa = _arrow()
+        table = pa.table({'prediction': prediction, 'probability': probability})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        content = sink.getvalue().to_pybytes()
+    else:
+        content = msgpack.packb({
+            'rows': int(len(pred)),
+            'prediction': prediction.tolist(),
+            'probability': probability.tolist()
+        })
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,115 @@
+import time
+import logging
+from contextlib import contextmanager
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .registry import get_model
+from .schema import WARMUP_ROW
+from .scoring import predict_frame, records_frame
+from .sharding import sharded_scorer
+from .threads import limit_native_threads
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Warmup passes per model (single row, then a small batch)
+WARMUP_BATCH_ROWS = 64
+
+startup_state = {
+    'ready': False,
+    'phases': {},
+    'errors': {}
+}
+
+
+@contextmanager
+def phase(name):
+    """Time one startup phase into startup_state['phases']."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        startup_state['phases'][name] = round(seconds, 4)
+        logger.info(f"Startup phase '{name}' took {seconds:.3f}s")
+
+
+def record_phase(name, seconds):
+    startup_state['phases'][name] = round(seconds, 4)
+
+
+def run_startup(loaders):
+    """
+    Import the ML libraries, load each model and run warmup inference,
+    then wait for the shard workers (if any) to load theirs.
+
+    `loaders` maps model name -> function returning the loaded model (or
+    None). The API is ready once every model has loaded and been warmed up.
+    """
+    with phase('import_libraries'):
+        import pandas
+        import sklearn
+        import xgboost
+        try:
+            import lightgbm
+        except ImportError:
+            logger.warning("lightgbm is not installed; the stacked model will not load")
+
+    with phase('thread_limits'):
+        # OpenMP/BLAS pools exist only once the libraries are imported
+        startup_state['thread_limits'] = limit_native_threads()
+
+    for name, loader in loaders.items():
+        with phase(f'load_{name}'):
+            if loader() is None:
+                startup_state['errors'][name] = "model not loaded"
+
+    for name in loaders:
+        model = get_model(name)
+        if model is None:
+            continue
+        with phase(f'warmup_{name}'):
+            try:
+                predict_frame(model, records_frame([WARMUP_ROW]))
+                predict_frame(model, records_frame([WARMUP_ROW] * WARMUP_BATCH_ROWS))
+            except Exception as e:
+                logger.error(f"Warmup of {name} failed: {str(e)}")
+                startup_state['errors'][name] = f"warmup failed: {str(e)}"
+
+    if sharded_scorer.pool is not None:
+        with phase('shard_workers'):
+            # A model the workers cannot load would silently be scored in-process
+            for name, error in sharded_scorer.wait_ready().items():
+                startup_state['errors'][f'shard_{name}'] = error
+
+    startup_state['ready'] = not startup_state['errors']
+    total = sum(startup_state['phases'].values())
+    logger.info(f"Startup finished in {total:.3f}s, ready={startup_state['ready']}")
+
+
+# Router
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """
+    Readiness: both models are loaded and warmed up. Includes the startup
+    timing breakdown per phase, in seconds.
+    """
+    content = {
+        "ready": startup_state['ready'],
+        "startup_seconds": startup_state['phases'],
+        "errors": startup_state['errors']
+    }
+    return JSONResponse(status_code=200 if startup_state['ready'] else 503, content=content)
@@ -8,10 +8,15 @@ from .preprocessing import LogTransformer, clean_and_feature_engineer, select_fe
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def expose_pickled_helpers():
+    """The pickled pipelines reference these as __main__ attributes; add them to the main module."""
+    sys.modules['__main__'].LogTransformer = LogTransformer
+    sys.modules['__main__'].clean_and_feature_engineer = clean_and_feature_engineer
+    sys.modules['__main__'].select_features = select_features
+
+
 # Add our classes to the main module 
-sys.modules['__main__'].LogTransformer = LogTransformer
-sys.modules['__main__'].clean_and_feature_engineer = clean_and_feature_engineer
-sys.modules['__main__'].select_features = select_features
+expose_pickled_helpers()
 
 def load_model(model_path):
 
@@ -0,0 +1,217 @@
+import os
+import queue
+import itertools
+import sqlite3
+import threading
+import time
+import logging
+import traceback
+
+import numpy as np
+from fastapi import APIRouter
+
+from .registry import get_version
+from .schema import FEATURE_COLUMNS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every scored row is logged unless PREDICTION_LOG_ENABLED=0
+PREDICTION_LOG_ENABLED = os.getenv('PREDICTION_LOG_ENABLED', '1') == '1'
+PREDICTION_LOG_PATH = os.getenv('PREDICTION_LOG_PATH', 'Data/predictions.db')
+# A flush happens once this many rows are pending...
+PREDICTION_LOG_BATCH_ROWS = int(os.getenv('PREDICTION_LOG_BATCH_ROWS', 1000))
+# ...or this long after the oldest pending row arrived, whichever is first.
+# A crash loses at most this much of the log.
+PREDICTION_LOG_FLUSH_SECONDS = float(os.getenv('PREDICTION_LOG_FLUSH_SECONDS', 1.0))
+# Rows waiting to be written; requests arriving when this is reached are not logged
+PREDICTION_LOG_QUEUE_ROWS = int(os.getenv('PREDICTION_LOG_QUEUE_ROWS', 1_000_000))
+
+COLUMNS = (
+    ['timestamp', 'model', 'model_version']
+    + FEATURE_COLUMNS
+    + ['prediction', 'probability', 'latency_ms', 'batch_rows']
+)
+
+CREATE_TABLE = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    timestamp REAL NOT NULL,
+    model TEXT NOT NULL,
+    model_version TEXT,
+    {', '.join(f'{field} REAL' for field in FEATURE_COLUMNS)},
+    prediction INTEGER NOT NULL,
+    probability REAL NOT NULL,
+    latency_ms REAL,
+    batch_rows INTEGER
+)
+"""
+INSERT = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+# Queue marker telling the writer to flush and exit
+_STOP = object()
+
+
+class PredictionLog:
+    """
+    Write-behind log of every prediction served, in a SQLite table.
+
+    The response path only does a non-blocking queue put of the scored
+    frame; a writer thread turns entries into rows and inserts them in one
+    transaction per flush. The queue is bounded in rows, not requests, so
+    large batches cannot pile up unbounded memory. The database runs in WAL
+    mode so readers (e.g. a notebook) don't block the writer.
+    """
+
+    def __init__(self, path=PREDICTION_LOG_PATH, enabled=PREDICTION_LOG_ENABLED,
+                 batch_rows=PREDICTION_LOG_BATCH_ROWS, flush_seconds=PREDICTION_LOG_FLUSH_SECONDS,
+                 queue_rows=PREDICTION_LOG_QUEUE_ROWS):
+        self.path = path
+        self.enabled = enabled
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.queue_rows = queue_rows
+        self.entries = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending_rows = 0
+        self.counters = {'rows_logged': 0, 'flushes': 0, 'dropped_requests': 0, 'dropped_rows': 0, 'errors': 0}
+        self.last_flush_ms = None
+        self.worker = None
+
+    def start(self):
+        if not self.enabled or self.worker is not None:
+            return
+        self.worker = threading.Thread(target=self._run, name='prediction-log', daemon=True)
+        self.worker.start()
+        logger.info(f"Logging predictions to {self.path}")
+
+    def stop(self, timeout=10):
+        """Flush what is pending and stop the writer. Blocks; call it off the event loop."""
+        if self.worker is None:
+            return
+        self.entries.put(_STOP)
+        self.worker.join(timeout)
+        if self.worker.is_alive():
+            logger.error(f"Prediction log still writing after {timeout}s; {self.pending_rows} rows may be lost")
+        self.worker = None
+
+    def record(self, model, df, pred, proba, latency_ms):
+        """Queue one scored request or batch; never blocks the caller."""
+        if self.worker is None:
+            return
+        pred = np.atleast_1d(pred)
+        n_rows = len(pred)
+        with self.lock:
+            if self.pending_rows + n_rows > self.queue_rows:
+                self.counters['dropped_requests'] += 1
+                self.counters['dropped_rows'] += n_rows
+                if self.counters['dropped_requests'] % 1000 == 1:
+                    logger.warning(f"Prediction log queue full; {self.counters['dropped_rows']} rows dropped so far")
+                return
+            self.pending_rows += n_rows
+        # Stamped on arrival: the flush deadline runs from here, not from when the writer gets to it
+        entry = (time.monotonic(), time.time(), model, get_version(model), df,
+                 pred, np.atleast_1d(proba), latency_ms)
+        self.entries.put_nowait(entry)
+
+    @staticmethod
+    def _rows(entry):
+        """Rows of one entry, built column by column (tolist per column, not per row)."""
+        _, timestamp, model, version, df, pred, proba, latency_ms = entry
+        n = len(pred)
+        columns = (
+            [itertools.repeat(timestamp, n), itertools.repeat(model, n), itertools.repeat(version, n)]
+            + [df[field].to_numpy().tolist() for field in FEATURE_COLUMNS]
+            + [pred.astype(int).tolist(), proba.astype(float).tolist(),
+               itertools.repeat(round(latency_ms, 3), n), itertools.repeat(n, n)]
+        )
+        return zip(*columns)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Committed flushes survive a process crash; only an OS crash can lose the last one
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(CREATE_TABLE)
+        conn.commit()
+        return conn
+
+    def _flush(self, conn, entries):
+        start = time.perf_counter()
+        n_rows = sum(len(entry[5]) for entry in entries)
+        try:
+            with conn:
+                conn.executemany(INSERT, itertools.chain.from_iterable(self._rows(entry) for entry in entries))
+            self.counters['rows_logged'] += n_rows
+            self.counters['flushes'] += 1
+            self.last_flush_ms = round((time.perf_counter() - start) * 1000, 3)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.error(f"Writing {n_rows} rows to the prediction log failed: {str(e)}")
+            logger.debug(traceback.format_exc())
+        finally:
+            with self.lock:
+                self.pending_rows -= n_rows
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            logger.error(f"Cannot open prediction log {self.path}: {str(e)}")
+            self.worker = None
+            return
+
+        stopping = False
+        while not stopping:
+            entry = self.entries.get()
+            if entry is _STOP:
+                break
+            entries = [entry]
+            rows = len(entry[5])
+            # The oldest pending entry sets the deadline. Under a backlog it has
+            # already passed, and only what is queued right now is taken.
+            deadline = entry[0] + self.flush_seconds
+            while rows < self.batch_rows:
+                timeout = deadline - time.monotonic()
+                try:
+                    entry = self.entries.get(timeout=timeout) if timeout > 0 else self.entries.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                entries.append(entry)
+                rows += len(entry[5])
+            self._flush(conn, entries)
+        conn.close()
+        logger.info(f"Prediction log closed after {self.counters['rows_logged']} rows")
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'running': self.worker is not None,
+            'path': self.path,
+            'queue_depth': self.entries.qsize(),
+            'pending_rows': self.pending_rows,
+            'last_flush_ms': self.last_flush_ms,
+            **self.counters
+        }
+
+
+prediction_log = PredictionLog()
+
+# Router
+router = APIRouter(
+    prefix="/monitor",
+    tags=["Monitoring"]
+)
+
+
+@router.get("/prediction-log")
+async def prediction_log_stats():
+    """
+    Write-behind prediction log counters: rows written, flushes, dropped rows.
+    """
+    return prediction_log.stats()
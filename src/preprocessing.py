@@ -4,6 +4,7 @@ from sklearn.feature_selection import SelectKBest, mutual_info_classif
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.base import BaseEstimator, TransformerMixin
+from .schema import FEATURE_COLUMNS
 
 class LogTransformer(BaseEstimator, TransformerMixin):
     
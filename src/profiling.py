@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import secrets
+import sysconfig
+import threading
+from collections import Counter
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bearer token for /debug/profile; the endpoint does not exist (404) while unset
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')
+MAX_PROFILE_SECONDS = 300
+TOP_FUNCTIONS = 40
+STDLIB = sysconfig.get_paths()['stdlib']
+
+# Innermost frames of a thread that is waiting rather than working
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('selectors.py', 'poll'),
+    ('socket.py', 'accept'),
+    ('connection.py', '_poll'),
+    ('connection.py', 'wait')
+}
+
+
+def _label(code):
+    """file:function, with paths shortened to the package, stdlib or repo-relative module."""
+    path = code.co_filename
+    if 'site-packages' in path:
+        path = path.split('site-packages', 1)[1].lstrip(os.sep)
+    elif path.startswith(STDLIB):
+        path = os.path.relpath(path, STDLIB)
+    elif path.startswith(os.getcwd()):
+        path = os.path.relpath(path)
+    return f"{path.rsplit('.py', 1)[0]}:{code.co_name}"
+
+
+def _stack(frame):
+    """Stack from root to leaf as a tuple of labels, or None if the thread is idle."""
+    leaf = frame.f_code
+    if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def _under_prefix(path, prefix):
+    """True if `path` is `prefix` or below it: /xgb matches /xgb/predict but not /xgbfoo."""
+    prefix = prefix.rstrip('/')
+    return path == prefix or path.startswith(prefix + '/')
+
+
+class ProfileSession:
+    """
+    Statistical profile of the next `max_requests` requests under `prefix`,
+    or of those arriving within `seconds`, whichever ends first.
+
+    A sampler thread snapshots every busy thread's stack each `interval`
+    while at least one profiled request is in flight, so both event-loop work
+    (validation, frame building) and threadpool work (pipeline, model) show up.
+    """
+
+    def __init__(self, prefix, max_requests, seconds, interval):
+        self.prefix = prefix
+        self.max_requests = max_requests
+        self.seconds = seconds
+        self.interval = interval
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + seconds
+        self.admitted = 0
+        self.finished = 0
+        self.in_flight = 0
+        self.ticks = 0
+        self.stacks = Counter()
+        self.done = asyncio.Event()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, name='profiler', daemon=True)
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def admit(self, path):
+        if not _under_prefix(path, self.prefix):
+            return False
+        if self.admitted >= self.max_requests or time.monotonic() > self.deadline:
+            return False
+        self.admitted += 1
+        return True
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            if self.in_flight == 0:
+                continue
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = _stack(frame)
+                if stack is not None:
+                    self.stacks[stack] += 1
+
+    def report(self):
+        total = sum(self.stacks.values())
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+
+        top = [
+            {
+                'function': label,
+                'self_samples': self_counts[label],
+                'self_pct': round(100 * self_counts[label] / total, 2) if total else 0.0,
+                'total_samples': count,
+                'total_pct': round(100 * count / total, 2) if total else 0.0
+            }
+            for label, count in total_counts.most_common()
+        ]
+        top.sort(key=lambda row: (row['self_samples'], row['total_samples']), reverse=True)
+        return {
+            'prefix': self.prefix,
+            'requests_profiled': self.finished,
+            'seconds': round(time.monotonic() - self.started_at, 3),
+            'interval_ms': self.interval * 1000,
+            'ticks': self.ticks,
+            'samples': total,
+            'top_functions': top[:TOP_FUNCTIONS],
+            'collapsed': self.collapsed()
+        }
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed-stack format, for flamegraph.pl or speedscope."""
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+
+# The armed session, if any; None keeps the middleware a pass-through
+active_session = None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware counting the requests of the armed profile session.
+    With no session armed it only checks one module attribute.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        session = active_session
+        if session is None or scope['type'] != 'http' or not session.admit(scope['path']):
+            return await self.app(scope, receive, send)
+
+        session.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.in_flight -= 1
+            session.finished += 1
+            if session.finished >= session.max_requests:
+                session.done.set()
+
+
+def _authorize(authorization):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not secrets.compare_digest(token, PROFILING_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid profiling token",
+                            headers={'WWW-Authenticate': 'Bearer'})
+
+
+# Router
+router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+    include_in_schema=False
+)
+
+
+@router.post("/profile")
+async def profile(
+    router_name: str = Query(..., alias="router", description="Router to profile, e.g. xgb or stacked"),
+    requests: int = Query(100, ge=1, le=100000),
+    seconds: float = Query(30, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    format: str = Query('json', pattern='^(json|collapsed)$'),
+    authorization: str = Header(None)
+):
+    """
+    Profile the next `requests` requests to a router, or those within `seconds`.
+
+    Waits until the session ends, then returns the top functions by self time
+    and the collapsed stacks (`format=collapsed` returns the stacks alone as
+    text, ready for a flame graph). Requires `Authorization: Bearer <PROFILING_TOKEN>`.
+    """
+    global active_session
+    _authorize(authorization)
+    prefix = router_name if router_name.startswith('/') else f"/{router_name}"
+    if _under_prefix(prefix, router.prefix):
+        raise HTTPException(status_code=400, detail="Cannot profile the debug endpoints")
+    if active_session is not None:
+        raise HTTPException(status_code=409, detail="A profile session is already running")
+
+    session = ProfileSession(prefix, requests, seconds, interval_ms / 1000)
+    session.start()
+    active_session = session
+    logger.info(f"Profiling up to {requests} requests to {prefix} for {seconds}s")
+    try:
+        await asyncio.wait_for(session.done.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        active_session = None
+        # Let admitted requests still in flight finish so their samples count
+        while session.in_flight and time.monotonic() < session.deadline + 5:
+            await asyncio.sleep(0.01)
+        await asyncio.get_running_loop().run_in_executor(None, session.stop)
+
+    if format == 'collapsed':
+        return PlainTextResponse(session.collapsed())
+    return session.report()
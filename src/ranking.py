@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import argparse
+
+import anyio
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from .admission import admission
+from .registry import get_model, get_version
+from .schema import FEATURE_COLUMNS
+from .scoring import predict_frame
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Client-partitioned population ranked by /ranking/top-clients (see src/client_store.py)
+RANKING_STORE_PATH = os.getenv('RANKING_STORE_PATH', 'datasets/partitioned')
+MAX_TOP_K = 10000
+
+# Raw columns the features are built from, with the client columns used by the filters
+RAW_COLUMNS = [
+    'client_id', 'invoice_date', 'counter_number', 'new_index', 'old_index',
+    'consommation_level_1', 'counter_coefficient',
+    'client_catg', 'region', 'disrict', 'creation_date'
+]
+FILTER_COLUMNS = ('region', 'disrict', 'client_catg')
+# Pause before retrying a bucket the model's admission queue turned away
+ADMISSION_RETRY_SECONDS = 0.05
+
+
+def _features(chunk):
+    from .preprocessing import clean_and_feature_engineer
+
+    return clean_and_feature_engineer(chunk)[FEATURE_COLUMNS]
+
+
+def _bucket_candidates(chunk, proba, k):
+    """Per-client risk (highest invoice probability) of one chunk, top k only."""
+    scored = chunk[['client_id', 'region', 'disrict', 'client_catg']].assign(probability=proba)
+    per_client = scored.groupby('client_id', sort=False).agg(
+        probability=('probability', 'max'),
+        mean_probability=('probability', 'mean'),
+        invoices=('probability', 'size'),
+        region=('region', 'first'),
+        disrict=('disrict', 'first'),
+        client_catg=('client_catg', 'first')
+    )
+    return per_client.nlargest(k, 'probability'), len(per_client)
+
+
+def rank_clients(model, store, k=100, region=None, disrict=None, client_catg=None, score=None):
+    """
+    The k clients with the highest fraud risk in the store.
+
+    A client's risk is the highest probability the model gives any of its
+    invoices. The population is streamed bucket by bucket (every bucket holds
+    complete client histories) and only a min-heap of the k best clients is
+    kept, so memory is one bucket plus k rows whatever the population size.
+    Filters are lists of allowed values, applied before anything is scored.
+    `score(features)` returns the probabilities of one bucket (default:
+    predict_frame with `model`).
+    """
+    if score is None:
+        def score(features):
+            return predict_frame(model, features)[1]
+
+    filters = {
+        column: values for column, values in
+        (('region', region), ('disrict', disrict), ('client_catg', client_catg)) if values
+    }
+    heap = []
+    rows = clients = 0
+    start = time.perf_counter()
+    for chunk in store.scan_merged(columns=RAW_COLUMNS, client_filters=filters):
+        if chunk.empty:
+            continue
+        proba = score(_features(chunk))
+        candidates, n_clients = _bucket_candidates(chunk, proba, k)
+        rows += len(chunk)
+        clients += n_clients
+        # Candidates come best first: stop at the first one the heap would reject
+        for client_id, row in zip(candidates.index, candidates.itertuples(index=False)):
+            entry = (row.probability, client_id, row)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+            else:
+                break
+
+    seconds = time.perf_counter() - start
+    ranked = sorted(heap, key=lambda entry: entry[:2], reverse=True)
+    return {
+        'k': k,
+        'filters': filters,
+        'clients': [
+            {
+                'rank': rank,
+                'client_id': client_id,
+                'region': int(row.region),
+                'disrict': int(row.disrict),
+                'client_catg': int(row.client_catg),
+                'invoices': int(row.invoices),
+                'probability': round(float(probability) * 100, 2),
+                'mean_probability': round(float(row.mean_probability) * 100, 2)
+            }
+            for rank, (probability, client_id, row) in enumerate(ranked, start=1)
+        ],
+        'clients_scanned': clients,
+        'rows_scanned': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds) if seconds > 0 else None
+    }
+
+
+def admitted_scorer(name, model):
+    """
+    Bucket scorer for rank_clients running in a threadpool thread: each
+    bucket waits for a slot of the model's admission controller, so a
+    full-population scan takes turns with live traffic.
+    """
+    async def score(features):
+        while True:
+            try:
+                async with admission[name].slot():
+                    _, proba = await run_in_threadpool(predict_frame, model, features)
+                    return proba
+            except HTTPException as e:
+                if e.status_code != 503:
+                    raise
+                await asyncio.sleep(ADMISSION_RETRY_SECONDS)
+
+    return lambda features: anyio.from_thread.run(score, features)
+
+
+# Opened on first use; None until then
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        from .client_store import ClientStore
+
+        _store = ClientStore(RANKING_STORE_PATH)
+    return _store
+
+
+# Router
+router = APIRouter(
+    prefix="/ranking",
+    tags=["Ranking"]
+)
+
+
+@router.get("/top-clients")
+async def top_clients(
+    model: str = Query('xgb', pattern='^(xgb|stacked)$'),
+    k: int = Query(100, ge=1, le=MAX_TOP_K),
+    region: list[int] = Query(None),
+    disrict: list[int] = Query(None),
+    client_catg: list[int] = Query(None)
+):
+    """
+    The `k` highest-risk clients of the population in RANKING_STORE_PATH.
+
+    Each client is ranked by the highest fraud probability (%) of its
+    invoices. `region`, `disrict` and `client_catg` may be repeated to allow
+    several values. A full scan takes a while on a large population; each
+    bucket is scored under the model's admission control.
+    """
+    pipeline = get_model(model)
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail=f"Model '{model}' not loaded")
+    try:
+        store = get_store()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"No client-partitioned data at {RANKING_STORE_PATH}; run python -m src.client_store first"
+        )
+    result = await run_in_threadpool(
+        rank_clients, pipeline, store, k, region, disrict, client_catg, admitted_scorer(model, pipeline)
+    )
+    result['model'] = model
+    result['model_version'] = get_version(model)
+    logger.info(
+        f"Ranked {result['clients_scanned']} clients ({result['rows_scanned']} invoices) "
+        f"with {model} in {result['seconds']}s"
+    )
+    return result
+
+
+def main():
+    from .client_store import ClientStore
+    from .model_loader import load_model
+
+    parser = argparse.ArgumentParser(description="Rank the highest-risk clients of a partitioned population")
+    parser.add_argument('--model', default='models/xgb_pipeline.joblib')
+    parser.add_argument('--store', default=RANKING_STORE_PATH)
+    parser.add_argument('--k', type=int, default=100)
+    parser.add_argument('--region', type=int, nargs='+', default=None)
+    parser.add_argument('--disrict', type=int, nargs='+', default=None)
+    parser.add_argument('--client-catg', type=int, nargs='+', default=None)
+    parser.add_argument('--output', default=None, help="Write the ranking to this CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = rank_clients(
+        load_model(args.model), ClientStore(args.store), args.k,
+        region=args.region, disrict=args.disrict, client_catg=args.client_catg
+    )
+    if args.output:
+        import pandas as pd
+
+        pd.DataFrame(result['clients']).to_csv(args.output, index=False)
+        logger.info(f"Wrote {len(result['clients'])} clients to {args.output}")
+    summary = {key: value for key, value in result.items() if key != 'clients'}
+    print(json.dumps(summary, indent=2))
+    for client in result['clients'][:10]:
+        print(f"{client['rank']:>4}  {client['client_id']:<24} {client['probability']:6.2f}%  "
+              f"region {client['region']}  invoices {client['invoices']}")
+
+
+if __name__ == "__main__":
+    main()
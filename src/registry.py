@@ -0,0 +1,37 @@
+import os
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Loaded pipelines by router name ('xgb', 'stacked'), shared by the
+# monitoring and background features that need a model other than their own
+models = {}
+# Artifact version of each loaded pipeline, e.g. 'xgb_pipeline.joblib@2024-05-01T12:00:00'
+versions = {}
+
+
+def artifact_version(path):
+    """Version label of a model artifact: file name and modification time."""
+    try:
+        mtime = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(os.path.getmtime(path)))
+    except OSError:
+        return os.path.basename(path)
+    return f"{os.path.basename(path)}@{mtime}"
+
+
+def register(name, model, path=None):
+    if model is None:
+        logger.warning(f"Not registering '{name}': model not loaded")
+        return
+    models[name] = model
+    versions[name] = artifact_version(path) if path else None
+
+
+def get_model(name):
+    return models.get(name)
+
+
+def get_version(name):
+    return versions.get(name)
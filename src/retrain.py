@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import logging
+import argparse
+
+import joblib
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from .model_loader import load_model
+from .preprocessing import FEATURE_COLUMNS
+from .search import resample
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BASE_MODEL_PATH = 'models/xgb_pipeline.joblib'
+
+
+def load_labelled(paths):
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    missing = [col for col in FEATURE_COLUMNS + ['target'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Labelled data is missing columns: {missing}")
+    return df[FEATURE_COLUMNS], df['target'].astype(int)
+
+
+def _training_arrays(pipeline, X, y, balance):
+    X = pipeline[:-1].transform(X)
+    y = y.to_numpy()
+    if balance:
+        try:
+            X, y = resample(X, y)
+        except ValueError as e:
+            # e.g. too few frauds for SMOTE, or already more balanced than 2:1
+            logger.warning(f"Training on the data as is, resampling failed: {str(e)}")
+    # The booster was trained on named columns and checks them on update
+    names = pipeline.steps[-1][1].get_booster().feature_names
+    return (pd.DataFrame(X, columns=names) if names else X), y
+
+
+def _with_model(pipeline, model):
+    """Same pipeline class and fitted preprocessing, new final model."""
+    return type(pipeline)(pipeline.steps[:-1] + [(pipeline.steps[-1][0], model)])
+
+
+def warm_start(pipeline, X, y, rounds=100, learning_rate=None, balance=True):
+    """
+    Continue boosting the pipeline's XGBoost model on new labelled rows.
+
+    The fitted preprocessor is kept as is, so the new trees see the same
+    feature space as the existing ones; `rounds` trees are added on top of
+    the current booster. Returns (new pipeline, fit seconds).
+    """
+    from xgboost import XGBClassifier
+
+    base = pipeline.steps[-1][1]
+    X_train, y_train = _training_arrays(pipeline, X, y, balance)
+    params = base.get_params()
+    params['n_estimators'] = rounds
+    if learning_rate is not None:
+        params['learning_rate'] = learning_rate
+
+    start = time.perf_counter()
+    model = XGBClassifier(**params)
+    model.fit(X_train, y_train, xgb_model=base.get_booster())
+    return _with_model(pipeline, model), time.perf_counter() - start
+
+
+def full_retrain(pipeline, X, y, rounds, balance=True):
+    """Fit the same model from scratch with `rounds` trees, for the time comparison."""
+    from xgboost import XGBClassifier
+
+    X_train, y_train = _training_arrays(pipeline, X, y, balance)
+    params = pipeline.steps[-1][1].get_params()
+    params['n_estimators'] = rounds
+
+    start = time.perf_counter()
+    model = XGBClassifier(**params)
+    model.fit(X_train, y_train)
+    return _with_model(pipeline, model), time.perf_counter() - start
+
+
+def holdout_auc(pipeline, X, y):
+    return float(roc_auc_score(y, pipeline.predict_proba(X)[:, 1]))
+
+
+def versioned_path(base_path, now=None):
+    """models/xgb_pipeline.joblib -> models/xgb_pipeline-20240501T120000.joblib"""
+    stem, ext = os.path.splitext(base_path)
+    return f"{stem}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{ext}"
+
+
+def update(pipeline, X_new, y_new, X_holdout, y_holdout, rounds=100, learning_rate=None,
+           max_auc_drop=0.002, balance=True, full_data=None):
+    """
+    Warm-start update with a quality gate.
+
+    The candidate is accepted when its holdout AUC is at most `max_auc_drop`
+    below the current model's. With `full_data` (X, y of the whole history)
+    a from-scratch retrain is timed for comparison. Returns (candidate,
+    report); the caller saves the candidate only if report['accepted'].
+    """
+    base_rounds = pipeline.steps[-1][1].get_booster().num_boosted_rounds()
+    candidate, fit_seconds = warm_start(pipeline, X_new, y_new, rounds, learning_rate, balance)
+
+    report = {
+        'new_rows': int(len(X_new)),
+        'holdout_rows': int(len(X_holdout)),
+        'base_rounds': int(base_rounds),
+        'added_rounds': int(rounds),
+        'base_auc': holdout_auc(pipeline, X_holdout, y_holdout),
+        'candidate_auc': holdout_auc(candidate, X_holdout, y_holdout),
+        'max_auc_drop': max_auc_drop,
+        'warm_start_seconds': round(fit_seconds, 3)
+    }
+    report['accepted'] = report['candidate_auc'] >= report['base_auc'] - max_auc_drop
+
+    if full_data is not None:
+        X_full, y_full = full_data
+        full, full_seconds = full_retrain(pipeline, X_full, y_full, base_rounds + rounds, balance)
+        report['full_retrain'] = {
+            'rows': int(len(X_full)),
+            'rounds': int(base_rounds + rounds),
+            'seconds': round(full_seconds, 3),
+            'auc': holdout_auc(full, X_holdout, y_holdout)
+        }
+        report['seconds_saved'] = round(full_seconds - fit_seconds, 3)
+        report['speedup'] = round(full_seconds / fit_seconds, 2) if fit_seconds > 0 else None
+    return candidate, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update the XGB pipeline with new labels")
+    parser.add_argument('--model', default=BASE_MODEL_PATH)
+    parser.add_argument('--data', nargs='+', required=True, help="CSV files of newly labelled rows (FraudInput columns + target)")
+    parser.add_argument('--holdout', nargs='+', default=None, help="Holdout CSV files (default: split from --data)")
+    parser.add_argument('--holdout-size', type=float, default=0.2)
+    parser.add_argument('--rounds', type=int, default=100, help="Boosting rounds to add")
+    parser.add_argument('--learning-rate', type=float, default=None)
+    parser.add_argument('--max-auc-drop', type=float, default=0.002)
+    parser.add_argument('--no-resample', action='store_true', help="Skip undersampling + SMOTE of the new rows")
+    parser.add_argument('--full-data', nargs='+', default=None, help="Full history CSVs, to time a full retrain")
+    parser.add_argument('--output', default=None, help="Artifact path (default: versioned next to --model)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pipeline = load_model(args.model)
+    X, y = load_labelled(args.data)
+    if args.holdout:
+        X_holdout, y_holdout = load_labelled(args.holdout)
+    else:
+        X, X_holdout, y, y_holdout = train_test_split(
+            X, y, test_size=args.holdout_size, random_state=42, stratify=y
+        )
+    full_data = load_labelled(args.full_data) if args.full_data else None
+
+    candidate, report = update(
+        pipeline, X, y, X_holdout, y_holdout,
+        rounds=args.rounds,
+        learning_rate=args.learning_rate,
+        max_auc_drop=args.max_auc_drop,
+        balance=not args.no_resample,
+        full_data=full_data
+    )
+    report['base_model'] = args.model
+
+    if report['accepted']:
+        output = args.output or versioned_path(args.model)
+        joblib.dump(candidate, output)
+        report['output'] = output
+        logger.info(f"Saved updated pipeline to {output}")
+    else:
+        report['output'] = None
+        logger.warning(
+            f"Rejected update: holdout AUC {report['candidate_auc']:.4f} vs {report['base_auc']:.4f}"
+        )
+
+    report_path = (report['output'] or versioned_path(args.model)).rsplit('.', 1)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import os
+import gzip
+import json
+import time
+import logging
+import argparse
+
+from fastapi import APIRouter, HTTPException, Query
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RISK_INDEX_PATH = os.getenv('RISK_INDEX_PATH', 'models/risk_index.json')
+# Client attributes the index is kept for; counter_type comes from the invoices
+CLIENT_DIMENSIONS = ('region', 'disrict', 'client_catg')
+DIMENSIONS = CLIENT_DIMENSIONS + ('counter_type',)
+CHUNK_ROWS = 500_000
+
+
+def _key(value):
+    """Index key of a value: ints and numeric strings alike ('101', 101, 101.0 -> '101')."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().upper()
+
+
+def count_frauds(clients, invoices=None):
+    """
+    Client and fraud counts per value of each dimension.
+
+    `clients` has client_id, target and the client dimensions. A client
+    counts once for every counter_type among its `invoices`.
+    """
+    counts = {dimension: {} for dimension in DIMENSIONS}
+    clients = clients.assign(target=clients['target'].astype(int))
+    for dimension in CLIENT_DIMENSIONS:
+        grouped = clients.groupby(dimension)['target'].agg(['size', 'sum'])
+        for value, row in grouped.iterrows():
+            counts[dimension][_key(value)] = [int(row['size']), int(row['sum'])]
+    if invoices is not None:
+        pairs = invoices[['client_id', 'counter_type']].drop_duplicates()
+        pairs = pairs.merge(clients[['client_id', 'target']], on='client_id')
+        grouped = pairs.groupby('counter_type')['target'].agg(['size', 'sum'])
+        for value, row in grouped.iterrows():
+            counts['counter_type'][_key(value)] = [int(row['size']), int(row['sum'])]
+    counts['_total'] = {'all': [int(len(clients)), int(clients['target'].sum())]}
+    return counts
+
+
+def count_csv(clients_csv, invoices_csv=None, chunk_rows=CHUNK_ROWS, exclude=()):
+    """
+    count_frauds over client_train / invoice_train CSVs, reading the invoices in chunks.
+
+    Only client_id, counter_type and the client table are held in memory.
+    Clients listed in `exclude` (already counted) and repeated client rows
+    are skipped. Returns the counts, the ids counted and the number skipped.
+    """
+    import pandas as pd
+
+    clients = pd.read_csv(clients_csv, usecols=['client_id', 'target', *CLIENT_DIMENSIONS], dtype={'client_id': str})
+    rows = len(clients)
+    clients = clients.drop_duplicates('client_id')
+    if exclude:
+        clients = clients[~clients['client_id'].isin(exclude)]
+    skipped = rows - len(clients)
+    client_ids = set(clients['client_id'])
+    if invoices_csv is None:
+        return count_frauds(clients), client_ids, skipped
+    pairs = pd.concat([
+        chunk.drop_duplicates()
+        for chunk in pd.read_csv(invoices_csv, usecols=['client_id', 'counter_type'], chunksize=chunk_rows,
+                                 dtype={'client_id': str})
+    ], ignore_index=True)
+    return count_frauds(clients, pairs), client_ids, skipped
+
+
+def client_ids_path(path=RISK_INDEX_PATH):
+    """Where the ids of the clients counted into the index at `path` are kept."""
+    return os.path.splitext(path)[0] + '_clients.txt.gz'
+
+
+def load_client_ids(path=RISK_INDEX_PATH):
+    """Ids of the clients already counted into the index at `path` (empty if none were recorded)."""
+    ids_path = client_ids_path(path)
+    if not os.path.isfile(ids_path):
+        return set()
+    with gzip.open(ids_path, 'rt') as f:
+        return set(f.read().split())
+
+
+def save_client_ids(client_ids, path=RISK_INDEX_PATH):
+    with gzip.open(client_ids_path(path), 'wt') as f:
+        f.write('\n'.join(sorted(client_ids)))
+
+
+class RiskIndex:
+    """
+    Historical fraud rates by region, disrict, client_catg and counter_type.
+
+    Only the (clients, frauds) counts of each value are stored, so the
+    index stays a few kilobytes and new labelled clients can be added
+    without recounting the history. The ids of the counted clients live in a
+    separate file (client_ids_path) that only refreshes read, so a client is
+    never counted twice. The served entries (rate and lift over
+    the overall rate) are precomputed, making a lookup two dict accesses.
+    """
+
+    def __init__(self, counts=None, sources=None, updated_at=None):
+        self.counts = counts or {dimension: {} for dimension in DIMENSIONS}
+        self.sources = sources or []
+        self.updated_at = updated_at
+        self.entries = {}
+        self._build_entries()
+
+    def _build_entries(self):
+        total_clients, total_frauds = self.counts.get('_total', {}).get('all', [0, 0])
+        base_rate = total_frauds / total_clients if total_clients else None
+        self.base_rate = base_rate
+        self.entries = {
+            dimension: {
+                value: {
+                    'clients': clients,
+                    'frauds': frauds,
+                    'fraud_rate': round(frauds / clients, 5) if clients else None,
+                    'lift': round(frauds / clients / base_rate, 3) if clients and base_rate else None
+                }
+                for value, (clients, frauds) in self.counts.get(dimension, {}).items()
+            }
+            for dimension in DIMENSIONS
+        }
+
+    def update(self, counts, source=None, skipped=0):
+        """Add counts of newly labelled clients (not already in the index)."""
+        for dimension, values in counts.items():
+            current = self.counts.setdefault(dimension, {})
+            for value, (clients, frauds) in values.items():
+                old_clients, old_frauds = current.get(value, (0, 0))
+                current[value] = [old_clients + clients, old_frauds + frauds]
+        self.updated_at = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())
+        if source is not None:
+            self.sources.append({
+                'source': source, 'clients': counts['_total']['all'][0], 'skipped': skipped, 'at': self.updated_at
+            })
+        self._build_entries()
+
+    def lookup(self, dimension, value):
+        return self.entries.get(dimension, {}).get(_key(value))
+
+    def enrich(self, values):
+        """{dimension: entry} for the dimensions given in `values` (None values skipped)."""
+        return {
+            dimension: self.lookup(dimension, value)
+            for dimension, value in values.items()
+            if value is not None and dimension in self.entries
+        }
+
+    def to_dict(self):
+        return {'counts': self.counts, 'sources': self.sources, 'updated_at': self.updated_at}
+
+    def save(self, path=RISK_INDEX_PATH):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=RISK_INDEX_PATH):
+        if not os.path.isfile(path):
+            logger.warning(f"No risk index at {path}; build one with python -m src.risk_index")
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['counts'], data.get('sources'), data.get('updated_at'))
+
+
+risk_index = RiskIndex.load()
+
+
+def enrichment_query(
+    enrich: bool = Query(False, description="Attach historical fraud rates (risk index) to the response"),
+    region: int = Query(None),
+    disrict: int = Query(None),
+    counter_type: str = Query(None)
+):
+    """
+    Dependency of the single-row predict endpoints: None unless `enrich`,
+    else the client attributes to look up besides the input's client_catg.
+    """
+    if not enrich:
+        return None
+    return {'region': region, 'disrict': disrict, 'counter_type': counter_type}
+
+
+def enrichment(values):
+    """Risk index entries for a prediction response ({} without an index)."""
+    return risk_index.enrich(values)
+
+
+# Router
+router = APIRouter(
+    prefix="/risk-index",
+    tags=["Risk Index"]
+)
+
+
+@router.get("")
+async def get_index():
+    """Fraud rate, lift and counts for every indexed value of each dimension."""
+    return {
+        'updated_at': risk_index.updated_at,
+        'base_rate': risk_index.base_rate,
+        'sources': risk_index.sources,
+        'dimensions': risk_index.entries
+    }
+
+
+@router.get("/{dimension}/{value}")
+async def lookup(dimension: str, value: str):
+    """Historical fraud rate of one value, e.g. /risk-index/region/101."""
+    if dimension not in DIMENSIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown dimension '{dimension}'; use one of {list(DIMENSIONS)}")
+    entry = risk_index.lookup(dimension, value)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No history for {dimension}={value}")
+    return {'dimension': dimension, 'value': value, **entry}
+
+
+@router.post("/reload")
+async def reload():
+    """Reload the index from RISK_INDEX_PATH after a rebuild or refresh."""
+    global risk_index
+    risk_index = RiskIndex.load()
+    return {'updated_at': risk_index.updated_at, 'base_rate': risk_index.base_rate}
+
+
+def build(clients_csv, invoices_csv=None, path=RISK_INDEX_PATH, update=False, chunk_rows=CHUNK_ROWS):
+    """
+    Build the index at `path`, or with `update` add the clients not already in it.
+
+    Saves the index and its client ids; returns the index and the number of
+    clients skipped as already counted or repeated.
+    """
+    known = load_client_ids(path) if update else set()
+    if update and not known:
+        logger.warning(f"No client ids recorded at {client_ids_path(path)}; repeated clients cannot be skipped")
+    counts, client_ids, skipped = count_csv(clients_csv, invoices_csv, chunk_rows, exclude=known)
+    index = RiskIndex.load(path) if update else RiskIndex()
+    index.update(counts, source=clients_csv, skipped=skipped)
+    index.save(path)
+    save_client_ids(known | client_ids, path)
+    return index, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the historical fraud-rate index")
+    parser.add_argument('--clients', default='datasets/client_train.csv', help="Labelled clients CSV (with target)")
+    parser.add_argument('--invoices', default='datasets/invoice_train.csv', help="Their invoices, for counter_type")
+    parser.add_argument('--output', default=RISK_INDEX_PATH)
+    parser.add_argument('--update', action='store_true',
+                        help="Add these clients to the existing index instead of rebuilding it")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    index, skipped = build(args.clients, args.invoices, args.output, args.update, args.chunk_rows)
+    logger.info(
+        f"{'Updated' if args.update else 'Built'} risk index at {args.output} from "
+        f"{index.sources[-1]['clients']} clients ({skipped} already counted or repeated) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Kept free of pandas/sklearn imports so the API can import it before the
+# heavy libraries are loaded during startup.
+
+# Raw input columns expected by the saved pipelines (same order as FraudInput)
+FEATURE_COLUMNS = [
+    'counter_number',
+    'account_age_days',
+    'new_index',
+    'old_index',
+    'consumption_level_1',
+    'counter_coefficient',
+    'client_catg',
+    'invoice_year',
+    'creation_year',
+    'creation_month'
+]
+
+# Input used to warm the models up at startup (the README example)
+WARMUP_ROW = {
+    'counter_number': 0,
+    'account_age_days': 0,
+    'new_index': 0,
+    'old_index': 0,
+    'consumption_level_1': 0.0,
+    'counter_coefficient': 0.0,
+    'client_catg': 0,
+    'invoice_year': 2015,
+    'creation_year': 0,
+    'creation_month': 6
+}
@@ -0,0 +1,48 @@
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from .threads import native_threads
+
+
+def predict_frame(model, df):
+    """
+    Score a DataFrame of FraudInput rows.
+
+    Returns (predictions, fraud probabilities in [0, 1]) as numpy arrays.
+    Calls the model once; predict() for our binary classifiers is the
+    probability thresholded at 0.5.
+    """
+    if len(df) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=float)
+    with native_threads():
+        try:
+            proba = np.asarray(model.predict_proba(df), dtype=np.float64)[:, 1]
+        except AttributeError:
+            # If predict_proba not available, just use predict
+            pred = np.asarray(model.predict(df)).astype(int)
+            return pred, pred.astype(float)
+    pred = (proba > 0.5).astype(int)
+    return pred, proba
+
+
+def records_frame(records):
+    """Build the model input frame from a list of FraudInput dicts."""
+    import pandas as pd
+
+    return pd.DataFrame(records)
+
+
+def columns_frame(columns, feature_columns):
+    """Build the model input frame from validated column arrays without copying rows."""
+    import pandas as pd
+
+    return pd.DataFrame({col: columns[col] for col in feature_columns}, columns=feature_columns)
+
+
+def batch_response(pred, proba):
+    """Columnar JSON response with numeric percentage probabilities."""
+    return JSONResponse(content={
+        "rows": int(len(pred)),
+        "prediction": pred.tolist(),
+        "probability": np.round(proba * 100, 1).tolist()
+    })
@@ -0,0 +1,323 @@
+import json
+import time
+import logging
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier, StackingClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import RobustScaler
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline
+from imblearn.under_sampling import RandomUnderSampler
+
+from .preprocessing import FEATURE_COLUMNS, LogTransformer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SEARCH_OUTPUT = 'models/{model}_search_pipeline.joblib'
+RANDOM_STATE = 42
+
+
+def build_preprocessor():
+    """The notebook's preprocessor: log1p then RobustScaler on the ten input columns."""
+    return ColumnTransformer(
+        transformers=[
+            ('num', Pipeline([
+                ('log_transform', LogTransformer()),
+                ('scaler', RobustScaler())
+            ]), FEATURE_COLUMNS)
+        ],
+        remainder='passthrough',
+        verbose_feature_names_out=False
+    )
+
+
+def resample(X, y, random_state=RANDOM_STATE):
+    """Undersample to 2:1, then SMOTE to 1:1, as in the notebook."""
+    X, y = RandomUnderSampler(sampling_strategy=0.5, random_state=random_state).fit_resample(X, y)
+    return SMOTE(sampling_strategy=1.0, random_state=random_state).fit_resample(X, y)
+
+
+def prepare_folds(X, y, n_splits=3, random_state=RANDOM_STATE):
+    """
+    Preprocess and resample every CV fold once.
+
+    Returns a list of (X_train, y_train, X_val, y_val) arrays: the training
+    part is resampled, the validation part keeps the real class balance.
+    Every trial of the search reuses these arrays.
+    """
+    folds = []
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for train_idx, val_idx in cv.split(X, y):
+        preprocessor = build_preprocessor()
+        X_train = preprocessor.fit_transform(X.iloc[train_idx])
+        X_val = preprocessor.transform(X.iloc[val_idx])
+        X_train, y_train = resample(X_train, y.iloc[train_idx].to_numpy(), random_state)
+        folds.append((np.ascontiguousarray(X_train, dtype=np.float32), np.asarray(y_train),
+                      np.ascontiguousarray(X_val, dtype=np.float32), y.iloc[val_idx].to_numpy()))
+    return folds
+
+
+def _xgb(**params):
+    from xgboost import XGBClassifier
+    return XGBClassifier(eval_metric='auc', random_state=RANDOM_STATE, n_jobs=1, **params)
+
+
+def _rf(**params):
+    return RandomForestClassifier(class_weight='balanced_subsample', random_state=RANDOM_STATE, n_jobs=1, **params)
+
+
+def _extratrees(**params):
+    return ExtraTreesClassifier(class_weight='balanced', random_state=RANDOM_STATE, n_jobs=1, **params)
+
+
+def _stacked(**params):
+    from lightgbm import LGBMClassifier
+    model = StackingClassifier(
+        estimators=[
+            ('rf', RandomForestClassifier(class_weight='balanced', random_state=RANDOM_STATE, n_jobs=1)),
+            ('ExtraTrees', _extratrees()),
+            ('XGB', _xgb())
+        ],
+        final_estimator=LGBMClassifier(class_weight='balanced', verbose=-1, random_state=RANDOM_STATE, n_jobs=1),
+        cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=RANDOM_STATE),
+        stack_method='predict_proba',
+        passthrough=False
+    )
+    return model.set_params(**params)
+
+
+# Search space per model: parameter -> sampler(rng)
+_TREES = {
+    'rf': {
+        'n_estimators': lambda rng: int(rng.integers(50, 301)),
+        'max_depth': lambda rng: int(rng.integers(6, 26)),
+        'min_samples_leaf': lambda rng: int(rng.integers(1, 21)),
+        'max_features': lambda rng: [None, 'sqrt', 0.5, 0.8][int(rng.integers(4))]
+    },
+    'extratrees': {
+        'n_estimators': lambda rng: int(rng.integers(50, 301)),
+        'max_depth': lambda rng: int(rng.integers(6, 21)),
+        'min_samples_leaf': lambda rng: int(rng.integers(1, 21)),
+        'max_features': lambda rng: [None, 'sqrt', 0.5, 0.8][int(rng.integers(4))]
+    },
+    'xgb': {
+        'n_estimators': lambda rng: int(rng.integers(100, 601)),
+        'max_depth': lambda rng: int(rng.integers(3, 11)),
+        'learning_rate': lambda rng: float(np.exp(rng.uniform(np.log(0.02), np.log(0.3)))),
+        'subsample': lambda rng: float(rng.uniform(0.6, 1.0)),
+        'colsample_bytree': lambda rng: float(rng.uniform(0.6, 1.0)),
+        'min_child_weight': lambda rng: int(rng.integers(1, 11))
+    }
+}
+
+SEARCH_SPACES = {
+    'xgb': (_xgb, _TREES['xgb']),
+    'rf': (_rf, _TREES['rf']),
+    'extratrees': (_extratrees, _TREES['extratrees']),
+    # Stacked members use the StackingClassifier step names of the notebook
+    'stacked': (_stacked, {
+        **{f"rf__{key}": sample for key, sample in _TREES['rf'].items()},
+        **{f"ExtraTrees__{key}": sample for key, sample in _TREES['extratrees'].items()},
+        **{f"XGB__{key}": sample for key, sample in _TREES['xgb'].items()}
+    })
+}
+
+
+def sample_candidates(space, n_candidates, rng):
+    return [{key: sample(rng) for key, sample in space.items()} for _ in range(n_candidates)]
+
+
+def scale_trees(params, resource):
+    """Shrink every n_estimators by the rung's resource fraction (at least 10 trees)."""
+    return {
+        key: max(10, int(round(value * resource))) if key.endswith('n_estimators') else value
+        for key, value in params.items()
+    }
+
+
+def run_trial(factory, params, fold, resource, deadline, seed):
+    """Fit one candidate on a subsample of one cached fold and score it on the full validation part."""
+    start = time.perf_counter()
+    if time.time() > deadline:
+        return {'status': 'skipped', 'auc': None, 'seconds': 0.0}
+
+    X_train, y_train, X_val, y_val = fold
+    if resource < 1.0:
+        rows = np.random.default_rng(seed).permutation(len(y_train))[:max(100, int(len(y_train) * resource))]
+        X_train, y_train = X_train[rows], y_train[rows]
+    try:
+        model = factory(**scale_trees(params, resource))
+        model.fit(X_train, y_train)
+        auc = float(roc_auc_score(y_val, model.predict_proba(X_val)[:, 1]))
+        status = 'ok'
+    except Exception as e:
+        logger.error(f"Trial failed with {params}: {str(e)}")
+        auc, status = None, 'failed'
+    return {'status': status, 'auc': auc, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def successive_halving(folds, model='xgb', n_candidates=27, eta=3, min_resource=None,
+                       budget_seconds=3600, n_jobs=-1, random_state=RANDOM_STATE):
+    """
+    Successive halving over data subsample and tree count.
+
+    Rung k fits the surviving candidates on a fraction min_resource * eta**k
+    of each training fold (trees scaled by the same fraction) and keeps the
+    best 1/eta by mean validation AUC, until one candidate runs on the full
+    folds. Trials run in parallel and none starts after the wall-clock
+    budget; the search then stops with the best result of the highest rung
+    reached.
+
+    Returns ((candidate, rung entry) of the winner or None, all candidates).
+    """
+    factory, space = SEARCH_SPACES[model]
+    rng = np.random.default_rng(random_state)
+    n_rungs = 1
+    while eta ** n_rungs <= n_candidates:
+        n_rungs += 1
+    min_resource = min_resource or eta ** -(n_rungs - 1)
+    deadline = time.time() + budget_seconds
+
+    candidates = [{'id': i, 'params': params, 'rungs': []}
+                  for i, params in enumerate(sample_candidates(space, n_candidates, rng))]
+    survivors = candidates
+    best = None
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for rung in range(n_rungs):
+            resource = min(1.0, min_resource * eta ** rung)
+            if time.time() > deadline:
+                logger.info(f"Budget exhausted before rung {rung}")
+                break
+            logger.info(f"Rung {rung}: {len(survivors)} candidates on {resource:.0%} of the data")
+
+            tasks = [(c, f) for c in survivors for f in range(len(folds))]
+            results = parallel(
+                delayed(run_trial)(factory, c['params'], folds[f], resource, deadline, random_state + f)
+                for c, f in tasks
+            )
+            for (candidate, f), result in zip(tasks, results):
+                if not candidate['rungs'] or candidate['rungs'][-1]['rung'] != rung:
+                    candidate['rungs'].append({'rung': rung, 'resource': resource, 'folds': []})
+                candidate['rungs'][-1]['folds'].append(result)
+
+            scored = []
+            for candidate in survivors:
+                entry = candidate['rungs'][-1]
+                aucs = [r['auc'] for r in entry['folds'] if r['status'] == 'ok']
+                entry['seconds'] = round(sum(r['seconds'] for r in entry['folds']), 3)
+                entry['mean_auc'] = float(np.mean(aucs)) if len(aucs) == len(folds) else None
+                if entry['mean_auc'] is not None:
+                    scored.append(candidate)
+            if not scored:
+                break
+            scored.sort(key=lambda c: c['rungs'][-1]['mean_auc'], reverse=True)
+            best = (scored[0], scored[0]['rungs'][-1])
+            survivors = scored[:max(1, len(scored) // eta)]
+
+    return best, candidates
+
+
+def fit_best(model, params, X, y):
+    """Refit the winning candidate on all the data behind a fresh preprocessor."""
+    factory, _ = SEARCH_SPACES[model]
+    preprocessor = build_preprocessor()
+    X_resampled, y_resampled = resample(preprocessor.fit_transform(X), y.to_numpy())
+    estimator = factory(**params)
+    estimator.fit(X_resampled, y_resampled)
+    return Pipeline([('preprocessor', preprocessor), ('model', estimator)])
+
+
+def search(X, y, model='xgb', n_candidates=27, eta=3, n_splits=3, budget_seconds=3600,
+           n_jobs=-1, cache_dir=None, random_state=RANDOM_STATE):
+    """Run the search and refit the best candidate. Returns (pipeline, report)."""
+    timings = {}
+    start = time.perf_counter()
+    prepare = joblib.Memory(cache_dir, verbose=0).cache(prepare_folds) if cache_dir else prepare_folds
+    folds = prepare(X, y, n_splits, random_state)
+    timings['prepare_folds'] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    best, candidates = successive_halving(
+        folds, model, n_candidates=n_candidates, eta=eta,
+        budget_seconds=budget_seconds, n_jobs=n_jobs, random_state=random_state
+    )
+    timings['search'] = round(time.perf_counter() - start, 3)
+    if best is None:
+        raise RuntimeError("No trial finished within the budget")
+    best, best_rung = best
+
+    start = time.perf_counter()
+    pipeline = fit_best(model, best['params'], X, y)
+    timings['refit'] = round(time.perf_counter() - start, 3)
+
+    trials = [
+        {'candidate': c['id'], 'params': c['params'], **{k: v for k, v in r.items() if k != 'folds'},
+         'fold_seconds': [f['seconds'] for f in r['folds']],
+         'skipped': sum(f['status'] == 'skipped' for f in r['folds'])}
+        for c in candidates for r in c['rungs']
+    ]
+    report = {
+        'model': model,
+        'rows': len(X),
+        'n_candidates': n_candidates,
+        'eta': eta,
+        'budget_seconds': budget_seconds,
+        'best': {
+            'candidate': best['id'],
+            'params': best['params'],
+            'rung': best_rung['rung'],
+            'resource': best_rung['resource'],
+            'cv_auc': best_rung['mean_auc']
+        },
+        'trial_seconds_total': round(sum(t['seconds'] for t in trials), 3),
+        'timings': timings,
+        'trials': trials
+    }
+    return pipeline, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budgeted successive-halving hyperparameter search")
+    parser.add_argument('--data', nargs='+', required=True, help="CSV files with the FraudInput columns and target")
+    parser.add_argument('--model', choices=sorted(SEARCH_SPACES), default='xgb')
+    parser.add_argument('--candidates', type=int, default=27)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=3600, help="Wall-clock budget in seconds")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Parallel trials (-1 = all cores)")
+    parser.add_argument('--cache-dir', default=None, help="Keep preprocessed folds here between runs")
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--report', default=None, help="Report path (defaults next to the output)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    df = pd.concat([pd.read_csv(path) for path in args.data], ignore_index=True)
+    missing = [col for col in FEATURE_COLUMNS + ['target'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Training data is missing columns: {missing}")
+
+    pipeline, report = search(
+        df[FEATURE_COLUMNS], df['target'].astype(int), model=args.model,
+        n_candidates=args.candidates, eta=args.eta, n_splits=args.folds,
+        budget_seconds=args.budget, n_jobs=args.n_jobs, cache_dir=args.cache_dir
+    )
+    output = args.output or SEARCH_OUTPUT.format(model=args.model)
+    joblib.dump(pipeline, output)
+    logger.info(f"Saved best pipeline to {output}")
+
+    report_path = args.report or output.rsplit('.', 1)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({key: report[key] for key in ('best', 'trial_seconds_total', 'timings')}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+import time
+import logging
+import traceback
+from collections import deque
+
+import numpy as np
+from fastapi import APIRouter, Query
+
+from .admission import admission
+from .registry import get_model
+from .scoring import predict_frame
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Shadow scoring is off unless SHADOW_ENABLED=1
+SHADOW_ENABLED = os.getenv('SHADOW_ENABLED', '0') == '1'
+# Secondary model scored in the background for each primary
+SHADOW_PAIRS = {'xgb': 'stacked', 'stacked': 'xgb'}
+# Rows waiting for shadow scoring; new jobs are dropped once this is reached
+SHADOW_QUEUE_ROWS = int(os.getenv('SHADOW_QUEUE_ROWS', 100_000))
+# Larger batches are shadow-scored on a uniform sample of this many rows
+SHADOW_MAX_BATCH_ROWS = int(os.getenv('SHADOW_MAX_BATCH_ROWS', 10_000))
+# Jobs that waited longer than this are dropped instead of scored
+SHADOW_MAX_AGE_SECONDS = float(os.getenv('SHADOW_MAX_AGE_SECONDS', 5))
+# Minutes of per-minute aggregates kept for queries
+SHADOW_RETENTION_MINUTES = int(os.getenv('SHADOW_RETENTION_MINUTES', 1440))
+
+# Histogram of secondary - primary probability, in [-1, 1]
+DELTA_BINS = np.linspace(-1.0, 1.0, 21)
+
+
+def _empty_stats():
+    return {
+        'scored': 0,
+        'disagreements': 0,
+        'sum_delta': 0.0,
+        'sum_abs_delta': 0.0,
+        'max_abs_delta': 0.0,
+        'delta_hist': np.zeros(len(DELTA_BINS) - 1, dtype=np.int64)
+    }
+
+
+class ShadowScorer:
+    """
+    Scores already-answered requests on a secondary model in a background thread.
+
+    The response path only does a non-blocking queue put. Results are kept as
+    per-minute aggregates per (primary, secondary) pair, so memory is bounded
+    by the retention window rather than by traffic.
+
+    Shadow work yields to live traffic: the queue is bounded in rows, large
+    batches are subsampled, and jobs are dropped while either model's
+    admission controller is saturated.
+    """
+
+    def __init__(self, enabled=SHADOW_ENABLED, queue_rows=SHADOW_QUEUE_ROWS,
+                 max_batch_rows=SHADOW_MAX_BATCH_ROWS, max_age=SHADOW_MAX_AGE_SECONDS,
+                 retention_minutes=SHADOW_RETENTION_MINUTES):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.queue_rows = queue_rows
+        self.max_batch_rows = max_batch_rows
+        self.jobs = queue.Queue()
+        self.pending_rows = 0
+        self.buckets = deque(maxlen=retention_minutes)
+        self.counters = {'submitted': 0, 'dropped_full': 0, 'dropped_busy': 0, 'dropped_stale': 0, 'errors': 0}
+        self.lock = threading.Lock()
+        self.worker = None
+
+    @staticmethod
+    def _busy(primary):
+        return any(admission[name].saturated() for name in (primary, SHADOW_PAIRS[primary]) if name in admission)
+
+    def submit(self, primary, df, proba):
+        """Queue a shadow job; never blocks the caller."""
+        if not self.enabled or get_model(SHADOW_PAIRS.get(primary)) is None:
+            return
+        if self._busy(primary):
+            self.counters['dropped_busy'] += 1
+            return
+        proba = np.atleast_1d(proba)
+        if len(proba) == 0:
+            return
+        if len(proba) > self.max_batch_rows:
+            sample = np.random.default_rng().choice(len(proba), self.max_batch_rows, replace=False)
+            df, proba = df.iloc[sample], proba[sample]
+        with self.lock:
+            if self.pending_rows + len(proba) > self.queue_rows:
+                self.counters['dropped_full'] += 1
+                return
+            self.pending_rows += len(proba)
+        self._ensure_worker()
+        self.jobs.put_nowait((time.time(), primary, df, proba))
+        self.counters['submitted'] += 1
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            queued_at, primary, df, primary_proba = self.jobs.get()
+            try:
+                self._score(queued_at, primary, df, primary_proba)
+            finally:
+                with self.lock:
+                    self.pending_rows -= len(primary_proba)
+
+    def _score(self, queued_at, primary, df, primary_proba):
+        if time.time() - queued_at > self.max_age:
+            self.counters['dropped_stale'] += 1
+            return
+        # Traffic may have picked up while the job waited
+        if self._busy(primary):
+            self.counters['dropped_busy'] += 1
+            return
+        secondary = SHADOW_PAIRS[primary]
+        try:
+            _, secondary_proba = predict_frame(get_model(secondary), df)
+            self._record(queued_at, f"{primary}->{secondary}", primary_proba, secondary_proba)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.error(f"Shadow scoring on {secondary} failed: {str(e)}")
+            logger.debug(traceback.format_exc())
+
+    def _record(self, timestamp, pair, primary_proba, secondary_proba):
+        delta = secondary_proba - primary_proba
+        disagreements = int(((primary_proba > 0.5) != (secondary_proba > 0.5)).sum())
+        hist, _ = np.histogram(np.clip(delta, -1.0, 1.0), bins=DELTA_BINS)
+        minute = int(timestamp // 60) * 60
+
+        with self.lock:
+            if not self.buckets or self.buckets[-1][0] != minute:
+                self.buckets.append((minute, {}))
+            stats = self.buckets[-1][1].setdefault(pair, _empty_stats())
+            stats['scored'] += len(delta)
+            stats['disagreements'] += disagreements
+            stats['sum_delta'] += float(delta.sum())
+            stats['sum_abs_delta'] += float(np.abs(delta).sum())
+            stats['max_abs_delta'] = max(stats['max_abs_delta'], float(np.abs(delta).max()))
+            stats['delta_hist'] += hist
+
+    def summary(self, minutes=60):
+        """Merge the per-minute aggregates of the last `minutes` minutes."""
+        since = time.time() - minutes * 60
+        merged = {}
+        with self.lock:
+            for minute, pairs in self.buckets:
+                if minute + 60 < since:
+                    continue
+                for pair, stats in pairs.items():
+                    total = merged.setdefault(pair, _empty_stats())
+                    for key in ('scored', 'disagreements', 'sum_delta', 'sum_abs_delta', 'delta_hist'):
+                        total[key] = total[key] + stats[key]
+                    total['max_abs_delta'] = max(total['max_abs_delta'], stats['max_abs_delta'])
+
+        pairs = {}
+        for pair, stats in merged.items():
+            scored = stats['scored']
+            pairs[pair] = {
+                'scored': scored,
+                'disagreement_rate': stats['disagreements'] / scored if scored else None,
+                'mean_delta': stats['sum_delta'] / scored if scored else None,
+                'mean_abs_delta': stats['sum_abs_delta'] / scored if scored else None,
+                'max_abs_delta': stats['max_abs_delta'],
+                'delta_histogram': {
+                    'edges': DELTA_BINS.round(2).tolist(),
+                    'counts': stats['delta_hist'].tolist()
+                }
+            }
+        return {
+            'enabled': self.enabled,
+            'window_minutes': minutes,
+            'queue_depth': self.jobs.qsize(),
+            'pending_rows': self.pending_rows,
+            **self.counters,
+            'pairs': pairs
+        }
+
+
+shadow_scorer = ShadowScorer()
+
+# Router
+router = APIRouter(
+    prefix="/shadow",
+    tags=["Monitoring"]
+)
+
+
+@router.get("/stats")
+async def shadow_stats(minutes: int = Query(60, ge=1, le=SHADOW_RETENTION_MINUTES)):
+    """
+    Disagreement rate and probability deltas between primary and shadow models.
+
+    Deltas are secondary minus primary probability, in [-1, 1].
+    """
+    return shadow_scorer.summary(minutes)
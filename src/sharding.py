@@ -0,0 +1,211 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .schema import FEATURE_COLUMNS
+from .scoring import predict_frame
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Worker processes for large batches; 0 (default) scores every batch in-process
+SHARD_PROCESSES = int(os.getenv('SHARD_PROCESSES', 0))
+# Rows per shard handed to one worker
+SHARD_ROWS = int(os.getenv('SHARD_ROWS', 50000))
+# Batches smaller than this are not worth the hand-off and are scored in-process
+SHARD_MIN_ROWS = int(os.getenv('SHARD_MIN_ROWS', 200000))
+# Threads each worker gives its models
+SHARD_WORKER_THREADS = int(os.getenv('SHARD_WORKER_THREADS', 1))
+
+# Models held by this worker process, loaded once by _init_worker, and the load errors
+_worker_models = {}
+_worker_errors = {}
+
+
+def _init_worker(model_paths, n_threads):
+    from .model_loader import expose_pickled_helpers, load_model
+    from .threads import apply_thread_budget
+
+    # In a spawned worker __main__ may be replaced after model_loader was first imported
+    expose_pickled_helpers()
+    for name, path in model_paths.items():
+        try:
+            _worker_models[name] = apply_thread_budget(load_model(path), n_threads)
+        except Exception as e:
+            _worker_errors[name] = str(e)
+            logger.error(f"Shard worker could not load {name}: {str(e)}")
+
+
+def _worker_ready():
+    return sorted(_worker_models), dict(_worker_errors)
+
+
+def _score_shard(name, features_name, proba_name, n_rows, start, stop):
+    """Score rows [start, stop) of the shared feature matrix into the shared output."""
+    import pandas as pd
+
+    model = _worker_models.get(name)
+    if model is None:
+        raise RuntimeError(f"Model '{name}' not loaded in shard worker")
+    features_shm = shared_memory.SharedMemory(name=features_name)
+    proba_shm = shared_memory.SharedMemory(name=proba_name)
+    features = proba = df = None
+    try:
+        features = np.ndarray((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64,
+                              buffer=features_shm.buf, order='F')
+        proba = np.ndarray((n_rows,), dtype=np.float64, buffer=proba_shm.buf)
+        df = pd.DataFrame(features[start:stop], columns=FEATURE_COLUMNS, copy=False)
+        _, proba[start:stop] = predict_frame(model, df)
+    finally:
+        # Views must be gone before the segments can be closed
+        features = proba = df = None
+        features_shm.close()
+        proba_shm.close()
+    return stop - start
+
+
+class ShardedScorer:
+    """
+    Scores very large batches across a pool of worker processes.
+
+    Every worker loads the models once at start-up. A batch is copied once
+    into a shared-memory feature matrix (column-major, so each input column
+    is one contiguous write), workers score row ranges of it in place and
+    write probabilities into a shared output array. Only shard boundaries
+    cross the process boundary, never the rows themselves.
+
+    The pool is swapped under a lock. A batch that finds its pool replaced
+    by another thread mid-way retries once on the new pool. Models a worker
+    could not load are reported by wait_ready() and scored in-process.
+    """
+
+    def __init__(self, processes=SHARD_PROCESSES, shard_rows=SHARD_ROWS,
+                 min_rows=SHARD_MIN_ROWS, worker_threads=SHARD_WORKER_THREADS):
+        self.processes = processes
+        self.shard_rows = shard_rows
+        self.min_rows = min_rows
+        self.worker_threads = worker_threads
+        self.pool = None
+        self.model_paths = {}
+        self.ready = []
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def start(self, model_paths):
+        with self.lock:
+            self._start(model_paths)
+
+    def _start(self, model_paths):
+        if self.processes <= 0 or self.pool is not None:
+            return
+        # spawn: forking a process that already runs threads is not safe
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_paths, self.worker_threads)
+        )
+        self.model_paths = dict(model_paths)
+        # Spawn every worker now so the models are loaded before the first large batch
+        self.ready = [self.pool.submit(_worker_ready) for _ in range(self.processes)]
+        logger.info(f"Started {self.processes} shard workers for {sorted(self.model_paths)}")
+
+    def wait_ready(self, timeout=None):
+        """
+        Wait for the workers to load their models. Returns {model: error} for
+        the models some worker could not load; those are scored in-process.
+        """
+        with self.lock:
+            futures, paths = self.ready, self.model_paths
+        errors = {}
+        for future in futures:
+            try:
+                _, worker_errors = future.result(timeout)
+            except Exception as e:
+                worker_errors = {name: f"worker failed to start: {str(e)}" for name in paths}
+            errors.update(worker_errors)
+        with self.lock:
+            if self.model_paths is paths:
+                self.model_paths = {name: path for name, path in paths.items() if name not in errors}
+        self.errors = errors
+        return errors
+
+    def stop(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _restart(self, broken):
+        """Replace `broken` with a new pool, unless another thread already has."""
+        with self.lock:
+            if self.pool is not broken:
+                return
+            logger.error("Shard worker pool broken, restarting it")
+            self.pool = None
+            self._start(self.model_paths)
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def predict(self, name, model, df):
+        """
+        Score `df` with the named model: sharded across the workers for large
+        batches, in-process (with `model`) otherwise. Same result as predict_frame.
+        """
+        pool = self.pool
+        if pool is None or name not in self.model_paths or len(df) < self.min_rows:
+            return predict_frame(model, df)
+        for attempt in range(2):
+            try:
+                return self._predict_sharded(pool, name, df)
+            except (BrokenProcessPool, CancelledError, RuntimeError) as e:
+                current = self.pool
+                if attempt == 0 and current is not None and current is not pool:
+                    # Another thread restarted or replaced the pool under this batch
+                    pool = current
+                    continue
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died (e.g. out of memory): replace the pool for the next batch
+                    self._restart(pool)
+                logger.error(f"Sharded scoring failed, scoring in-process: {str(e)}")
+                break
+            except Exception as e:
+                logger.error(f"Sharded scoring failed, scoring in-process: {str(e)}")
+                break
+        return predict_frame(model, df)
+
+    def _predict_sharded(self, pool, name, df):
+        n_rows = len(df)
+        features_shm = shared_memory.SharedMemory(create=True, size=n_rows * len(FEATURE_COLUMNS) * 8)
+        proba_shm = shared_memory.SharedMemory(create=True, size=n_rows * 8)
+        features = None
+        try:
+            features = np.ndarray((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64,
+                                  buffer=features_shm.buf, order='F')
+            for i, col in enumerate(FEATURE_COLUMNS):
+                features[:, i] = df[col].to_numpy()
+
+            futures = [
+                pool.submit(_score_shard, name, features_shm.name, proba_shm.name,
+                                 n_rows, start, min(start + self.shard_rows, n_rows))
+                for start in range(0, n_rows, self.shard_rows)
+            ]
+            for future in futures:
+                future.result()
+
+            proba = np.ndarray((n_rows,), dtype=np.float64, buffer=proba_shm.buf).copy()
+        finally:
+            features = None
+            features_shm.close()
+            features_shm.unlink()
+            proba_shm.close()
+            proba_shm.unlink()
+        return (proba > 0.5).astype(int), proba
+
+
+sharded_scorer = ShardedScorer()
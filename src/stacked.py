@@ -1,40 +1,69 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 import numpy as np
 import logging
+import os
+import time
 import traceback
-from .preprocessing import LogTransformer
-from .model_loader import load_model
+from .admission import admission
+from .columnar import COLUMNAR_OPENAPI, ColumnarValidationError, validate_columns
+from .drift import drift_monitor
+from .formats import encode_response, read_payload
+from .prediction_log import prediction_log
+from .registry import register
+from .risk_index import enrichment, enrichment_query
+from .schema import FEATURE_COLUMNS
+from .scoring import columns_frame, predict_frame, records_frame
+from .shadow import shadow_scorer
+from .sharding import sharded_scorer
+from .threads import apply_thread_budget, thread_budget
+from .tracing import record_span, request_started_ns, span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# model path 
-MODEL_PATH = 'models/stacked_pipeline.joblib'
+# model path (set STACKED_MODEL_PATH=models/stacked_student.joblib to serve the distilled student)
+MODEL_PATH = os.getenv('STACKED_MODEL_PATH', 'models/stacked_pipeline.joblib')
 
+# Set by load() during the API startup phase
+stacked_model = None
 
-try:
-    logger.info("Attempting to load stacked model...")
-    stacked_model = load_model(MODEL_PATH)
-    logger.info("Successfully loaded stacked model")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
-    logger.error(traceback.format_exc())
-    stacked_model = None
+
+def load():
+    """
+    Load the stacked pipeline. Called from the API lifespan so importing this
+    module stays cheap.
+    """
+    global stacked_model
+    from .model_loader import load_model
+
+    try:
+        logger.info("Attempting to load stacked model...")
+        stacked_model = load_model(MODEL_PATH)
+        apply_thread_budget(stacked_model, thread_budget('stacked'))
+        logger.info("Successfully loaded stacked model")
+    except Exception as e:
+        logger.error(f"Error loading model: {str(e)}")
+        logger.error(traceback.format_exc())
+        stacked_model = None
+
+    register('stacked', stacked_model, MODEL_PATH)
+    return stacked_model
 
 class FraudInput(BaseModel):
-    counter_number: int
-    account_age_days: int
-    new_index: int
-    old_index: int
-    consumption_level_1: float
-    counter_coefficient: float
-    client_catg: int
-    invoice_year: int
-    creation_year: int
-    creation_month: int
+    # Same bounds as the columnar batch endpoints (src/columnar.py FIELD_SPECS)
+    counter_number: int = Field(ge=0)
+    account_age_days: int = Field(ge=0)
+    new_index: int = Field(ge=0)
+    old_index: int = Field(ge=0)
+    consumption_level_1: float = Field(ge=0)
+    counter_coefficient: float = Field(ge=0)
+    client_catg: int = Field(ge=0)
+    invoice_year: int = Field(ge=0)
+    creation_year: int = Field(ge=0)
+    creation_month: int = Field(ge=1, le=12)
 
 # Router 
 router = APIRouter(
@@ -43,30 +72,32 @@ router = APIRouter(
 )
 
 @router.post("/predict")
-async def predict_fraud(input_data: FraudInput):
+async def predict_fraud(input_data: FraudInput, request: Request, risk_context: dict = Depends(enrichment_query)):
     """
     Predict fraud using the stacked model
     """
     if stacked_model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
         
+    started = time.perf_counter()
+    # body parsing and FraudInput validation happen before the handler runs
+    record_span('parse_and_validate', request_started_ns())
     try:
         logger.info("Converting input to DataFrame")
         # input to DataFrame
-        df = pd.DataFrame([input_data.dict()])
+        with span('build_frame'):
+            df = records_frame([input_data.dict()])
         logger.info(f"Input data: {df.to_dict()}")
         
         logger.info("Making prediction")
-        #prediction and probability
+        #prediction and probability, off the event loop once admitted
         try:
-            pred_proba = stacked_model.predict_proba(df)
-            pred = stacked_model.predict(df)
-            prob = pred_proba[0][1] * 100  
-        except AttributeError as e:
-            logger.warning(f"predict_proba not available: {str(e)}")
-            # If predict_proba not available, just use predict
-            pred = stacked_model.predict(df)
-            prob = 100 if pred[0] == 1 else 0
+            async with admission['stacked'].slot(request):
+                with span('model', model='stacked', rows=1):
+                    pred, proba = await run_in_threadpool(predict_frame, stacked_model, df)
+            prob = proba[0] * 100
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Prediction error: {str(e)}")
             raise HTTPException(
@@ -79,13 +110,65 @@ async def predict_fraud(input_data: FraudInput):
             "probability": f"{prob:.1f}%",
             "prediction_text": "Fraudulent" if pred[0] == 1 else "Non-Fraudulent"
         }
+        if risk_context is not None:
+            result["risk_index"] = enrichment({**risk_context, 'client_catg': input_data.client_catg})
         logger.info(f"Prediction result: {result}")
+        with span('monitoring'):
+            drift_monitor.observe('stacked', df, prob / 100)
+            shadow_scorer.submit('stacked', df, prob / 100)
+            prediction_log.record('stacked', df, pred, proba, (time.perf_counter() - started) * 1000)
         return result
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during prediction: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(
             status_code=500,
             detail=f"Prediction error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/predict/batch", openapi_extra=COLUMNAR_OPENAPI)
+async def predict_fraud_batch(request: Request):
+    """
+    Predict fraud for a columnar batch using the stacked model.
+
+    Each FraudInput field maps to an array of equal length; validation errors
+    are reported per field and row index. Besides JSON, the body and response
+    can be Arrow IPC or MessagePack (see Content-Type / Accept).
+    """
+    if stacked_model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+
+    started = time.perf_counter()
+    with span('decode', content_type=request.headers.get('content-type')):
+        payload = await read_payload(request)
+
+    try:
+        with span('validate'):
+            columns = validate_columns(payload)
+    except ColumnarValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+    try:
+        with span('build_frame'):
+            df = columns_frame(columns, FEATURE_COLUMNS)
+        async with admission['stacked'].slot(request):
+            with span('model', model='stacked', rows=len(df)):
+                pred, proba = await run_in_threadpool(sharded_scorer.predict, 'stacked', stacked_model, df)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during batch prediction: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    logger.info(f"Scored batch of {len(df)} rows")
+    with span('monitoring'):
+        drift_monitor.observe('stacked', df, proba)
+        shadow_scorer.submit('stacked', df, proba)
+        prediction_log.record('stacked', df, pred, proba, (time.perf_counter() - started) * 1000)
+    with span('encode'):
+        return encode_response(request, pred, proba)
@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import itertools
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+
+from .admission import admission
+from .columnar import ColumnarValidationError, validate_columns
+from .drift import drift_monitor
+from .prediction_log import prediction_log
+from .registry import get_model
+from .schema import FEATURE_COLUMNS
+from .scoring import columns_frame, predict_frame
+from .shadow import shadow_scorer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Most records scored together, and how long to wait for a batch to fill
+STREAM_BATCH_ROWS = int(os.getenv('STREAM_BATCH_ROWS', 512))
+STREAM_BATCH_WAIT_MS = float(os.getenv('STREAM_BATCH_WAIT_MS', 5))
+# Records received but not yet scored, per connection. When it is full the
+# server stops reading the socket until the model catches up.
+STREAM_MAX_PENDING = int(os.getenv('STREAM_MAX_PENDING', 4096))
+# Pause before retrying a batch the model's admission queue turned away
+ADMISSION_RETRY_SECONDS = 0.05
+
+_connection_ids = itertools.count(1)
+# Stats of the open connections, by connection id
+connections = {}
+# Totals over closed connections
+closed = {'connections': 0, 'received': 0, 'scored': 0, 'rejected': 0}
+
+
+class StreamStats:
+    """Per-connection counters, reported to the client and at /stream/stats."""
+
+    def __init__(self, model):
+        self.model = model
+        self.started = time.monotonic()
+        self.received = 0
+        self.scored = 0
+        self.rejected = 0
+        self.batches = 0
+        self.model_seconds = 0.0
+        self.backpressure_seconds = 0.0
+        self.max_pending = 0
+
+    def to_dict(self, pending=0):
+        seconds = time.monotonic() - self.started
+        return {
+            'model': self.model,
+            'seconds': round(seconds, 3),
+            'received': self.received,
+            'scored': self.scored,
+            'rejected': self.rejected,
+            'pending': pending,
+            'max_pending': self.max_pending,
+            'batches': self.batches,
+            'mean_batch_rows': round(self.scored / self.batches, 1) if self.batches else None,
+            'records_per_sec': round(self.scored / seconds, 1) if seconds > 0 else None,
+            'model_seconds': round(self.model_seconds, 3),
+            'backpressure_seconds': round(self.backpressure_seconds, 3)
+        }
+
+
+def _records(message):
+    """(records, control) from one client message: a record, a list of records, or {"type": ...}."""
+    data = json.loads(message)
+    if isinstance(data, dict) and 'type' in data:
+        return [], data['type']
+    if isinstance(data, dict):
+        return [data], None
+    if isinstance(data, list) and all(isinstance(record, dict) for record in data):
+        return data, None
+    raise ValueError("Send a FraudInput object, a list of them, or {\"type\": \"stats\"}")
+
+
+def _validate(records):
+    """
+    Columns of the valid records, their positions, and per-record errors.
+
+    Uses the batch endpoint's columnar validation; rows it reports are set
+    aside and the rest validated again, so one bad record does not fail
+    its batch.
+    """
+    errors = {}
+    keep = list(range(len(records)))
+    while keep:
+        payload = {field: [records[i].get(field) for i in keep] for field in FEATURE_COLUMNS}
+        try:
+            return validate_columns(payload), keep, errors
+        except ColumnarValidationError as e:
+            for error in e.errors:
+                # loc is ["body", field, row]; the row is replaced by the record id in the reply
+                errors.setdefault(keep[error['loc'][2]], []).append({**error, 'loc': error['loc'][:2]})
+        keep = [i for i in keep if i not in errors]
+    return None, [], errors
+
+
+class StreamConnection:
+    """
+    One scoring stream: a reader task fills a bounded queue of records and a
+    scorer task drains it in batches of up to STREAM_BATCH_ROWS.
+
+    When the model falls behind, the queue fills, the reader stops reading,
+    and TCP flow control slows the sender down. No records are dropped.
+    """
+
+    def __init__(self, websocket, model_name, batch_rows=STREAM_BATCH_ROWS,
+                 batch_wait=STREAM_BATCH_WAIT_MS / 1000, max_pending=STREAM_MAX_PENDING):
+        self.websocket = websocket
+        self.model_name = model_name
+        self.batch_rows = batch_rows
+        self.batch_wait = batch_wait
+        self.pending = asyncio.Queue(maxsize=max_pending)
+        self.stats = StreamStats(model_name)
+        self.sequence = itertools.count()
+        self.send_lock = asyncio.Lock()
+
+    async def send(self, message):
+        async with self.send_lock:
+            await self.websocket.send_text(json.dumps(message))
+
+    async def read(self):
+        while True:
+            message = await self.websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message.get('text') is None:
+                await self.send({'type': 'error', 'detail': "Send records as text (JSON) messages, not binary"})
+                continue
+            try:
+                records, control = _records(message['text'])
+            except ValueError as e:
+                await self.send({'type': 'error', 'detail': str(e)})
+                continue
+            if control == 'stats':
+                await self.send({'type': 'stats', **self.stats.to_dict(self.pending.qsize())})
+                continue
+            if control is not None:
+                await self.send({'type': 'error', 'detail': f"Unknown message type '{control}'"})
+                continue
+            for record in records:
+                record_id = record.pop('id', None)
+                item = (next(self.sequence) if record_id is None else record_id, record)
+                self.stats.received += 1
+                if self.pending.full():
+                    blocked = time.monotonic()
+                    await self.pending.put(item)
+                    self.stats.backpressure_seconds += time.monotonic() - blocked
+                else:
+                    self.pending.put_nowait(item)
+                self.stats.max_pending = max(self.stats.max_pending, self.pending.qsize())
+
+    async def _next_batch(self):
+        """Up to batch_rows records; waits at most batch_wait for the batch to fill."""
+        batch = [await self.pending.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_rows:
+            try:
+                batch.append(self.pending.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.pending.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def score(self):
+        while True:
+            batch = await self._next_batch()
+            ids = [record_id for record_id, _ in batch]
+            columns, keep, errors = _validate([record for _, record in batch])
+            if errors:
+                self.stats.rejected += len(errors)
+                await self.send({'type': 'errors', 'errors': [
+                    {'id': ids[i], 'errors': row_errors} for i, row_errors in errors.items()
+                ]})
+            if not keep:
+                continue
+
+            started = time.perf_counter()
+            df = columns_frame(columns, FEATURE_COLUMNS)
+            pred, proba = await self._predict(df)
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.stats.model_seconds += latency_ms / 1000
+            self.stats.batches += 1
+            self.stats.scored += len(keep)
+            await self.send({
+                'type': 'scores',
+                'ids': [ids[i] for i in keep],
+                'prediction': pred.tolist(),
+                'probability': np.round(proba * 100, 1).tolist()
+            })
+
+            drift_monitor.observe(self.model_name, df, proba)
+            shadow_scorer.submit(self.model_name, df, proba)
+            prediction_log.record(self.model_name, df, pred, proba, latency_ms)
+
+    async def _predict(self, df):
+        """Score a batch, waiting (not failing) while the model's admission queue is full."""
+        model = get_model(self.model_name)
+        while True:
+            try:
+                async with admission[self.model_name].slot():
+                    return await run_in_threadpool(predict_frame, model, df)
+            except HTTPException as e:
+                if e.status_code != 503:
+                    raise
+                await asyncio.sleep(ADMISSION_RETRY_SECONDS)
+
+    async def run(self):
+        """Serve until the client disconnects; records still queued then are dropped."""
+        reader = asyncio.create_task(self.read())
+        scorer = asyncio.create_task(self.score())
+        try:
+            done, _ = await asyncio.wait({reader, scorer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            reader.cancel()
+            scorer.cancel()
+        for task in done:
+            task.result()
+
+
+# Router
+router = APIRouter(
+    prefix="/stream",
+    tags=["Streaming"]
+)
+
+
+@router.websocket("/{model}")
+async def stream(websocket: WebSocket, model: str):
+    """
+    Score a continuous stream of FraudInput records over one WebSocket.
+
+    Each text message is a record (optionally with an "id"), or a list of
+    records. Scores come back batched as {"type": "scores", "ids",
+    "prediction", "probability"}, invalid records as {"type": "errors"}.
+    Send {"type": "stats"} for the connection's throughput.
+    """
+    if model not in admission or get_model(model) is None:
+        await websocket.close(code=1008, reason=f"Model '{model}' not available")
+        return
+    await websocket.accept()
+    connection_id = next(_connection_ids)
+    connection = StreamConnection(websocket, model)
+    connections[connection_id] = connection
+    try:
+        await connection.run()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Stream {connection_id} failed: {str(e)}")
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        del connections[connection_id]
+        stats = connection.stats.to_dict()
+        closed['connections'] += 1
+        for key in ('received', 'scored', 'rejected'):
+            closed[key] += stats[key]
+        logger.info(
+            f"Stream {connection_id} ({model}) closed: {stats['scored']} records in "
+            f"{stats['seconds']}s ({stats['records_per_sec']}/s), {stats['batches']} batches"
+        )
+
+
+@router.get("/stats")
+async def stream_stats():
+    """Throughput of each open stream, and totals over closed ones."""
+    return {
+        'open': {
+            connection_id: connection.stats.to_dict(connection.pending.qsize())
+            for connection_id, connection in connections.items()
+        },
+        'closed': closed
+    }
@@ -0,0 +1,40 @@
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from xgboost import XGBRegressor
+
+
+class DistilledClassifier(BaseEstimator, ClassifierMixin):
+    """
+    Compact gradient-boosted student fitted on the teacher's soft probabilities.
+
+    Exposes predict/predict_proba like the stacked model so the routers can
+    serve it without changes.
+    """
+
+    def __init__(self, n_estimators=200, max_depth=4, learning_rate=0.1, n_jobs=1, random_state=42):
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.learning_rate = learning_rate
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        # y holds soft targets in [0, 1], so regress on them with a logistic link
+        self.model_ = XGBRegressor(
+            objective='reg:logistic',
+            n_estimators=self.n_estimators,
+            max_depth=self.max_depth,
+            learning_rate=self.learning_rate,
+            n_jobs=self.n_jobs,
+            random_state=self.random_state
+        )
+        self.model_.fit(X, y)
+        self.classes_ = np.array([0, 1])
+        return self
+
+    def predict_proba(self, X):
+        prob = np.clip(self.model_.predict(X), 0.0, 1.0)
+        return np.column_stack([1.0 - prob, prob])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
@@ -0,0 +1,97 @@
+import os
+import logging
+from contextlib import nullcontext
+from threadpoolctl import ThreadpoolController
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Inference threads per model unless overridden, e.g. XGB_THREADS=2 or STACKED_THREADS=4.
+# With several uvicorn workers, keep workers * threads <= cores.
+DEFAULT_THREADS = 1
+
+# Parameters that control the native/joblib thread pools of our estimators
+THREAD_PARAMS = ('n_jobs', 'nthread')
+# Packages whose estimators get the thread budget; the rest stay single-threaded
+NATIVE_BOOSTER_MODULES = ('xgboost', 'lightgbm')
+
+# BLAS/OpenMP pools found once the ML libraries are loaded, and the cap applied around inference
+_native_pools = None
+_native_limit = None
+
+# Attributes holding nested estimators (pipelines, column transformers, stacks, students)
+NESTED_ATTRS = ('steps', 'transformers_', 'estimators_', 'final_estimator_', 'model_')
+
+
+def thread_budget(name):
+    """Inference thread budget for a model, read from <NAME>_THREADS or MODEL_THREADS."""
+    value = os.getenv(f"{name.upper()}_THREADS", os.getenv("MODEL_THREADS", DEFAULT_THREADS))
+    return max(1, int(value))
+
+
+def _iter_estimators(obj, seen=None):
+    seen = seen if seen is not None else set()
+    if obj is None or id(obj) in seen:
+        return
+    seen.add(id(obj))
+    yield obj
+    for attr in NESTED_ATTRS:
+        nested = getattr(obj, attr, None)
+        if nested is None:
+            continue
+        items = nested if isinstance(nested, (list, tuple)) else [nested]
+        for item in items:
+            # (name, estimator[, columns]) tuples from pipelines and column transformers
+            if isinstance(item, tuple):
+                item = item[1]
+            if hasattr(item, 'get_params'):
+                yield from _iter_estimators(item, seen)
+
+
+def _is_native_booster(estimator):
+    """XGBoost and LightGBM models, whose threads are native and cheap to use per call."""
+    return type(estimator).__module__.split('.')[0] in NATIVE_BOOSTER_MODULES
+
+
+def apply_thread_budget(model, n_threads):
+    """
+    Cap n_jobs/nthread on the boosters inside a fitted pipeline.
+
+    XGBoost forwards the change to its booster and LightGBM reads n_jobs at
+    predict time. Every other estimator (column transformers, stacking,
+    sklearn forests) is kept sequential: their n_jobs starts a joblib pool
+    per predict call, which costs far more than a single row takes to score.
+    """
+    updated = 0
+    for estimator in _iter_estimators(model):
+        params = estimator.get_params(deep=False)
+        budget = n_threads if _is_native_booster(estimator) else None
+        changes = {key: budget for key in THREAD_PARAMS if key in params}
+        if changes:
+            estimator.set_params(**changes)
+            updated += budget is not None
+    logger.info(f"Applied thread budget of {n_threads} to {updated} boosters")
+    return model
+
+
+def limit_native_threads():
+    """
+    Set the cap applied to BLAS/OpenMP pools around each inference call.
+
+    OpenMP thread counts are per calling thread, so a limit set once at
+    startup would not reach the threadpool threads that run inference;
+    native_threads() applies it around every call instead. Call this after
+    the ML libraries are imported. Returns the cap.
+    """
+    global _native_pools, _native_limit
+    _native_limit = int(os.getenv("NATIVE_THREADS", max(thread_budget('xgb'), thread_budget('stacked'))))
+    _native_pools = ThreadpoolController()
+    logger.info(f"Limiting native thread pools to {_native_limit} threads during inference")
+    return _native_limit
+
+
+def native_threads():
+    """Context capping BLAS/OpenMP threads in the calling thread (a no-op before limit_native_threads)."""
+    if _native_pools is None:
+        return nullcontext()
+    return _native_pools.limit(limits=_native_limit)
@@ -0,0 +1,303 @@
+import os
+import json
+import queue
+import random
+import secrets
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Fraction of new traces recorded (0 = tracing off). Requests carrying a
+# traceparent follow the caller's sampling decision instead.
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0))
+# Finished traces, one OTLP/JSON ExportTraceServiceRequest per line
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', 'Data/traces.jsonl')
+TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', 10000))
+
+# W3C trace context header: 00-<trace id>-<parent span id>-<flags>
+TRACEPARENT = 'traceparent'
+TRACEPARENT_KEY = TRACEPARENT.encode()
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+_current_trace = ContextVar('current_trace', default=None)
+_current_span = ContextVar('current_span', default=None)
+
+
+def new_trace_id():
+    return secrets.token_hex(16)
+
+
+def new_span_id():
+    return secrets.token_hex(8)
+
+
+def should_sample(rate=TRACE_SAMPLE_RATE):
+    return rate > 0 and random.random() < rate
+
+
+def format_traceparent(trace_id, span_id, sampled=True):
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+def parse_traceparent(value):
+    """(trace id, parent span id, sampled) from a traceparent header, or None if malformed."""
+    parts = value.strip().split('-') if value else []
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Trace:
+    """Spans of one sampled request, collected until the request finishes."""
+
+    def __init__(self, trace_id, service):
+        self.trace_id = trace_id
+        self.service = service
+        self.started_ns = time.time_ns()
+        self.spans = []
+
+    def add(self, name, span_id, parent_id, start_ns, end_ns, kind=INTERNAL, error=None, **attributes):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': span_id,
+            'parentSpanId': parent_id or '',
+            'name': name,
+            'kind': kind,
+            'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(end_ns),
+            'attributes': [_attribute(key, value) for key, value in attributes.items() if value is not None],
+            'status': {'code': 2, 'message': error} if error else {'code': 1}
+        }
+        self.spans.append(span)
+
+    def to_otlp(self):
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [_attribute('service.name', self.service)]},
+                'scopeSpans': [{'scope': {'name': 'fraud-detection'}, 'spans': self.spans}]
+            }]
+        }
+
+
+class FileExporter:
+    """
+    Appends finished traces to a JSON-lines file from a background thread.
+
+    Each line is an OTLP/JSON export request, the format an OpenTelemetry
+    collector's file receiver and otlp-json tooling read. Traces are dropped,
+    not waited on, when the queue is full.
+    """
+
+    def __init__(self, path=TRACE_EXPORT_PATH, queue_size=TRACE_QUEUE_SIZE):
+        self.path = path
+        self.traces = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def export(self, trace):
+        self._ensure_worker()
+        try:
+            self.traces.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            with self.lock:
+                if self.worker is None or not self.worker.is_alive():
+                    self.worker = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                    self.worker.start()
+
+    def _run(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            traces = [self.traces.get()]
+            while True:
+                try:
+                    traces.append(self.traces.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a') as f:
+                    f.writelines(json.dumps(trace.to_otlp()) + '\n' for trace in traces)
+            except Exception as e:
+                logger.error(f"Could not write traces to {self.path}: {str(e)}")
+
+    def flush(self, timeout=5):
+        """Wait (up to `timeout` seconds) for queued traces to be written."""
+        deadline = time.monotonic() + timeout
+        while not self.traces.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+exporter = FileExporter()
+
+
+def start_trace(service, trace_id=None, span_id=None):
+    """
+    Make a new trace current, with `span_id` as the current span. Returns
+    (trace, context tokens for end_trace).
+    """
+    trace = Trace(trace_id or new_trace_id(), service)
+    return trace, (_current_trace.set(trace), _current_span.set(span_id))
+
+
+def end_trace(trace, tokens):
+    _current_trace.reset(tokens[0])
+    _current_span.reset(tokens[1])
+    exporter.export(trace)
+
+
+@contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    """
+    Record a child span of the current span. Does nothing (and costs one
+    context lookup) when the current request is not sampled.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    span_id = new_span_id()
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start_ns = time.time_ns()
+    error = None
+    try:
+        yield span_id
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add(name, span_id, parent_id, start_ns, time.time_ns(), kind, error, **attributes)
+
+
+@contextmanager
+def root_span(service, name, kind=INTERNAL, sample_rate=TRACE_SAMPLE_RATE, **attributes):
+    """
+    Start a trace whose root span covers the block, if sampled at
+    `sample_rate`. Yields the Trace, or None when not sampled.
+    """
+    if not should_sample(sample_rate):
+        yield None
+        return
+    span_id = new_span_id()
+    trace, tokens = start_trace(service, span_id=span_id)
+    error = None
+    try:
+        yield trace
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        trace.add(name, span_id, None, trace.started_ns, time.time_ns(), kind, error, **attributes)
+        end_trace(trace, tokens)
+
+
+def traceparent_headers(span_id):
+    """Headers propagating the current trace to a downstream call made inside `span_id`."""
+    trace = _current_trace.get()
+    if trace is None or span_id is None:
+        return {}
+    return {TRACEPARENT: format_traceparent(trace.trace_id, span_id)}
+
+
+def record_span(name, start_ns, end_ns=None, **attributes):
+    """Record an already-timed child span of the current span (time.time_ns() values)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, new_span_id(), _current_span.get(), start_ns, end_ns or time.time_ns(), **attributes)
+
+
+def request_started_ns():
+    """Start of the current traced request, or None when it is not sampled."""
+    trace = _current_trace.get()
+    return trace.started_ns if trace is not None else None
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per sampled HTTP request.
+
+    The trace id and parent span come from an incoming traceparent header;
+    requests without one are sampled at TRACE_SAMPLE_RATE. Unsampled
+    requests pass straight through.
+    """
+
+    def __init__(self, app, service='fraud-detection-api', sample_rate=TRACE_SAMPLE_RATE):
+        self.app = app
+        self.service = service
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        parent = None
+        for key, value in scope.get('headers', ()):
+            if key == TRACEPARENT_KEY:
+                parent = parse_traceparent(value.decode('latin-1'))
+                break
+        sampled = parent[2] if parent is not None else should_sample(self.sample_rate)
+        if not sampled:
+            return await self.app(scope, receive, send)
+
+        # Stage spans recorded by the routers are children of the server span
+        server_span_id = new_span_id()
+        trace, tokens = start_trace(self.service, parent[0] if parent else None, server_span_id)
+        status = {'code': None}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                message.setdefault('headers', []).append(
+                    (TRACEPARENT_KEY, format_traceparent(trace.trace_id, server_span_id).encode())
+                )
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if error is None and status['code'] is not None and status['code'] >= 500:
+                error = f"HTTP {status['code']}"
+            trace.add(
+                f"{scope['method']} {scope['path']}", server_span_id, parent[1] if parent else None,
+                trace.started_ns, time.time_ns(), SERVER, error,
+                **{'http.method': scope['method'], 'http.target': scope['path'],
+                   'http.status_code': status['code']}
+            )
+            end_trace(trace, tokens)
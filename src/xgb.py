@@ -1,37 +1,78 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 import numpy as np
 import logging
+import os
+import time
 import traceback
-from .preprocessing import LogTransformer
-from .model_loader import load_model
+from .admission import admission
+from .columnar import COLUMNAR_OPENAPI, ColumnarValidationError, validate_columns
+from .drift import drift_monitor
+from .explain import EXPLAIN_EXACT_MAX_ROWS, EXPLAIN_MAX_ROWS, ContributionExplainer, contributions_to_proba
+from .formats import encode_response, read_payload
+from .prediction_log import prediction_log
+from .registry import register
+from .risk_index import enrichment, enrichment_query
+from .schema import FEATURE_COLUMNS
+from .scoring import columns_frame, predict_frame, records_frame
+from .shadow import shadow_scorer
+from .sharding import sharded_scorer
+from .threads import apply_thread_budget, thread_budget
+from .tracing import record_span, request_started_ns, span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# model path
+MODEL_PATH = os.getenv('XGB_MODEL_PATH', 'models/xgb_pipeline.joblib')
 
-try:
-    logger.info("Attempting to load XGB model...")
-    xgb_model = load_model('models/xgb_pipeline.joblib')
-    logger.info("Successfully loaded XGB model")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
-    logger.error(traceback.format_exc())
-    xgb_model = None
+# Set by load() during the API startup phase
+xgb_model = None
+xgb_explainer = None
+
+
+def load():
+    """
+    Load the XGB pipeline and its explainer. Called from the API lifespan so
+    importing this module stays cheap.
+    """
+    global xgb_model, xgb_explainer
+    from .model_loader import load_model
+
+    try:
+        logger.info("Attempting to load XGB model...")
+        xgb_model = load_model(MODEL_PATH)
+        apply_thread_budget(xgb_model, thread_budget('xgb'))
+        logger.info("Successfully loaded XGB model")
+    except Exception as e:
+        logger.error(f"Error loading model: {str(e)}")
+        logger.error(traceback.format_exc())
+        xgb_model = None
+
+    register('xgb', xgb_model, MODEL_PATH)
+
+    try:
+        xgb_explainer = ContributionExplainer(xgb_model) if xgb_model is not None else None
+    except Exception as e:
+        logger.error(f"Error creating explainer: {str(e)}")
+        xgb_explainer = None
+    return xgb_model
 
 class FraudInput(BaseModel):
-    counter_number: int
-    account_age_days: int
-    new_index: int
-    old_index: int
-    consumption_level_1: float
-    counter_coefficient: float
-    client_catg: int
-    invoice_year: int
-    creation_year: int
-    creation_month: int
+    # Same bounds as the columnar batch endpoints (src/columnar.py FIELD_SPECS)
+    counter_number: int = Field(ge=0)
+    account_age_days: int = Field(ge=0)
+    new_index: int = Field(ge=0)
+    old_index: int = Field(ge=0)
+    consumption_level_1: float = Field(ge=0)
+    counter_coefficient: float = Field(ge=0)
+    client_catg: int = Field(ge=0)
+    invoice_year: int = Field(ge=0)
+    creation_year: int = Field(ge=0)
+    creation_month: int = Field(ge=1, le=12)
 
 # Router 
 router = APIRouter(
@@ -40,36 +81,170 @@ router = APIRouter(
 )
 
 @router.post("/predict")
-async def predict_fraud(data: FraudInput):
+async def predict_fraud(data: FraudInput, request: Request, risk_context: dict = Depends(enrichment_query)):
     if xgb_model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
         
+    started = time.perf_counter()
+    # body parsing and FraudInput validation happen before the handler runs
+    record_span('parse_and_validate', request_started_ns())
     try:
         logger.info("Converting input to DataFrame")
         # input to DataFrame
-        df = pd.DataFrame([data.dict()])
+        with span('build_frame'):
+            df = records_frame([data.dict()])
         logger.info(f"Input data: {df.to_dict()}")
         
         logger.info("Making prediction")
-        # prediction and probability
-        try:
-            pred_proba = xgb_model.predict_proba(df)
-            pred = xgb_model.predict(df)
-            prob = pred_proba[0][1] * 100  
-        except AttributeError:
-            # If predict_proba not available, just use predict
-            pred = xgb_model.predict(df)
-            prob = 100 if pred[0] == 1 else 0
-        
+        # prediction and probability, off the event loop once admitted
+        async with admission['xgb'].slot(request):
+            with span('model', model='xgb', rows=1):
+                pred, proba = await run_in_threadpool(predict_frame, xgb_model, df)
+        prob = proba[0] * 100
+
         result = {
             "prediction": int(pred[0]),
             "probability": f"{prob:.1f}%",
             "prediction_text": "Fraudulent" if pred[0] == 1 else "Non-Fraudulent"
         }
+        if risk_context is not None:
+            result["risk_index"] = enrichment({**risk_context, 'client_catg': data.client_catg})
         logger.info(f"Prediction result: {result}")
+        with span('monitoring'):
+            drift_monitor.observe('xgb', df, prob / 100)
+            shadow_scorer.submit('xgb', df, prob / 100)
+            prediction_log.record('xgb', df, pred, proba, (time.perf_counter() - started) * 1000)
         return result
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during prediction: {str(e)}")
         logger.error(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/predict/batch", openapi_extra=COLUMNAR_OPENAPI)
+async def predict_fraud_batch(request: Request):
+    """
+    Predict fraud for a columnar batch using the XGB model.
+
+    Each FraudInput field maps to an array of equal length; validation errors
+    are reported per field and row index. Besides JSON, the body and response
+    can be Arrow IPC or MessagePack (see Content-Type / Accept).
+    """
+    if xgb_model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+
+    started = time.perf_counter()
+    with span('decode', content_type=request.headers.get('content-type')):
+        payload = await read_payload(request)
+
+    try:
+        with span('validate'):
+            columns = validate_columns(payload)
+    except ColumnarValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+    try:
+        with span('build_frame'):
+            df = columns_frame(columns, FEATURE_COLUMNS)
+        async with admission['xgb'].slot(request):
+            with span('model', model='xgb', rows=len(df)):
+                pred, proba = await run_in_threadpool(sharded_scorer.predict, 'xgb', xgb_model, df)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during batch prediction: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    logger.info(f"Scored batch of {len(df)} rows")
+    with span('monitoring'):
+        drift_monitor.observe('xgb', df, proba)
+        shadow_scorer.submit('xgb', df, proba)
+        prediction_log.record('xgb', df, pred, proba, (time.perf_counter() - started) * 1000)
+    with span('encode'):
+        return encode_response(request, pred, proba)
+
+
+@router.post("/explain")
+async def explain_fraud(data: FraudInput, request: Request, approximate: bool = False):
+    """
+    Per-feature contributions to the XGBoost prediction.
+
+    Contributions are in log-odds and add up, with `base_value`, to the model
+    margin. `approximate=true` uses the faster Saabas approximation.
+    """
+    if xgb_explainer is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+
+    try:
+        df = records_frame([data.dict()])
+        async with admission['xgb'].slot(request):
+            contribs = (await run_in_threadpool(xgb_explainer.explain, df, approximate))[0]
+        prob = float(contributions_to_proba(contribs[None, :])[0]) * 100
+        pred = int(prob > 50)
+        return {
+            "prediction": pred,
+            "probability": f"{prob:.1f}%",
+            "prediction_text": "Fraudulent" if pred == 1 else "Non-Fraudulent",
+            "base_value": float(contribs[-1]),
+            "contributions": dict(zip(FEATURE_COLUMNS, contribs[:-1].tolist()))
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during explanation: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/explain/batch", openapi_extra=COLUMNAR_OPENAPI)
+async def explain_fraud_batch(request: Request, approximate: bool = False):
+    """
+    Per-feature contributions for a columnar batch (same body as /xgb/predict/batch).
+
+    Returns one array per field, aligned with the input rows. Batches over
+    EXPLAIN_EXACT_MAX_ROWS are explained with the approximation, and batches
+    over EXPLAIN_MAX_ROWS are rejected with 413.
+    """
+    if xgb_explainer is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+
+    payload = await read_payload(request)
+    try:
+        columns = validate_columns(payload)
+    except ColumnarValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+    n_rows = len(columns[FEATURE_COLUMNS[0]])
+    if n_rows > EXPLAIN_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {n_rows} rows; explain at most {EXPLAIN_MAX_ROWS} rows per request"
+        )
+    approximate = approximate or n_rows > EXPLAIN_EXACT_MAX_ROWS
+
+    try:
+        df = columns_frame(columns, FEATURE_COLUMNS)
+        async with admission['xgb'].slot(request):
+            contribs = await run_in_threadpool(xgb_explainer.explain, df, approximate)
+        proba = contributions_to_proba(contribs)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during batch explanation: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return JSONResponse(content={
+        "rows": len(df),
+        "approximate": approximate,
+        "prediction": (proba > 0.5).astype(int).tolist(),
+        "probability": np.round(proba * 100, 1).tolist(),
+        "base_value": contribs[:, -1].tolist(),
+        "contributions": {
+            field: contribs[:, i].tolist() for i, field in enumerate(FEATURE_COLUMNS)
+        }
+    })
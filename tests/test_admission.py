@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.admission import AdmissionController
+
+
+async def hold(controller, release):
+    async with controller.slot():
+        await release.wait()
+
+
+def test_requests_beyond_the_queue_are_shed_with_503():
+    async def run():
+        controller = AdmissionController('test', max_concurrent=1, max_queue=1)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, release))
+        queued = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0.01)
+        assert (controller.in_flight, controller.waiting) == (1, 1)
+        assert controller.saturated()
+
+        with pytest.raises(HTTPException) as e:
+            async with controller.slot():
+                pass
+        assert e.value.status_code == 503
+        assert 'Retry-After' in e.value.headers
+
+        release.set()
+        await asyncio.gather(running, queued)
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.counters['admitted'] == 2
+    assert controller.counters['shed_queue_full'] == 1
+    assert not controller.saturated()
+
+
+def test_deadline_passing_in_the_queue_is_shed():
+    request = Request({'type': 'http', 'headers': [(b'x-request-deadline-ms', b'20')]})
+
+    async def run():
+        controller = AdmissionController('test', max_concurrent=1, max_queue=10)
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as e:
+            async with controller.slot(request):
+                pass
+        release.set()
+        await running
+        return controller, e.value
+
+    controller, error = asyncio.run(run())
+    assert error.status_code == 503
+    assert controller.counters['shed_deadline'] == 1
+    assert controller.waiting == 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from src.columnar import ColumnarValidationError, validate_columns
+from src.schema import FEATURE_COLUMNS
+
+ROW = {
+    'counter_number': 5, 'account_age_days': 120, 'new_index': 300, 'old_index': 250,
+    'consumption_level_1': 50.0, 'counter_coefficient': 1.0, 'client_catg': 11,
+    'invoice_year': 2015, 'creation_year': 2010, 'creation_month': 6
+}
+
+
+def columns(n=3, **overrides):
+    payload = {field: [value] * n for field, value in ROW.items()}
+    payload.update(overrides)
+    return payload
+
+
+def test_validate_columns_returns_numpy_columns():
+    result = validate_columns(columns())
+    assert set(result) == set(FEATURE_COLUMNS)
+    assert result['creation_month'].dtype == np.int64
+    assert result['consumption_level_1'].tolist() == [50.0] * 3
+
+
+def test_validate_columns_locates_errors_by_field_and_row():
+    with pytest.raises(ColumnarValidationError) as e:
+        validate_columns(columns(new_index=[1, -1, 2], creation_month=[6, 13, 0]))
+    errors = {(tuple(error['loc']), error['type']) for error in e.value.errors}
+    assert errors == {
+        (('body', 'new_index', 1), 'greater_than_equal'),
+        (('body', 'creation_month', 1), 'less_than_equal'),
+        (('body', 'creation_month', 2), 'greater_than_equal')
+    }
+
+
+def test_validate_columns_rejects_mismatched_lengths():
+    with pytest.raises(ColumnarValidationError) as e:
+        validate_columns(columns(old_index=[1, 2]))
+    assert [error['type'] for error in e.value.errors] == ['length_mismatch']
+
+
+@pytest.mark.parametrize('module', ['src.xgb', 'src.stacked'])
+def test_single_row_input_has_the_columnar_bounds(module):
+    fraud_input = pytest.importorskip(module).FraudInput
+    fraud_input(**ROW)
+    for field, value in (('new_index', -1), ('creation_month', 13), ('creation_month', 0)):
+        with pytest.raises(ValidationError):
+            fraud_input(**{**ROW, field: value})
+        with pytest.raises(ColumnarValidationError):
+            validate_columns(columns(1, **{field: [value]}))
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.explain import ContributionExplainer, contributions_to_proba
+from src.schema import FEATURE_COLUMNS
+
+xgboost = pytest.importorskip('xgboost')
+
+
+def frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({field: rng.integers(1, 13, n) for field in FEATURE_COLUMNS})
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    df = frame(300)
+    target = (df['new_index'] + df['creation_month'] > 13).astype(int)
+    model = xgboost.XGBClassifier(n_estimators=10, max_depth=3, n_jobs=1)
+    return Pipeline([('preprocessor', StandardScaler()), ('model', model)]).fit(df, target)
+
+
+@pytest.mark.parametrize('approximate', [False, True])
+def test_contributions_add_up_to_the_prediction(pipeline, approximate):
+    df = frame(50, seed=1)
+    contribs = ContributionExplainer(pipeline, cache_size=0).explain(df, approximate)
+    assert contribs.shape == (50, len(FEATURE_COLUMNS) + 1)
+    np.testing.assert_allclose(contributions_to_proba(contribs), pipeline.predict_proba(df)[:, 1], atol=1e-5)
+
+
+def test_cached_rows_are_reused_and_own_their_data(pipeline):
+    explainer = ContributionExplainer(pipeline, cache_size=100)
+    df = frame(20, seed=2)
+    first = explainer.explain(df)
+    np.testing.assert_array_equal(explainer.explain(df), first)
+    assert explainer.stats()['hits'] == 20
+    # Each cached row is a copy, not a view pinning the batch array
+    assert all(row.base is None for row in explainer.cache.values())
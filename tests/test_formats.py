@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.formats import ARROW, ARROW_FILE, JSON, MSGPACK, negotiate, read_payload
+
+ROW = {
+    'counter_number': 5, 'account_age_days': 120, 'new_index': 300, 'old_index': 250,
+    'consumption_level_1': 50.0, 'counter_coefficient': 1.0, 'client_catg': 11,
+    'invoice_year': 2015, 'creation_year': 2010, 'creation_month': 6
+}
+
+
+def columns(n=3):
+    return {field: [value] * n for field, value in ROW.items()}
+
+
+# App echoing the decoded body and the negotiated response type
+app = FastAPI()
+
+
+@app.post("/decode")
+async def decode(request: Request):
+    payload = await read_payload(request)
+    return {field: np.asarray(values).tolist() for field, values in payload.items()}
+
+
+@app.get("/negotiate")
+async def negotiated(request: Request):
+    return {'media_type': negotiate(request)}
+
+
+client = TestClient(app)
+
+
+def test_read_json_body():
+    response = client.post("/decode", json=columns())
+    assert response.status_code == 200
+    assert response.json() == columns()
+
+
+def test_read_msgpack_body():
+    msgpack = pytest.importorskip('msgpack')
+    response = client.post("/decode", content=msgpack.packb(columns()), headers={'Content-Type': MSGPACK})
+    assert response.json() == columns()
+
+
+@pytest.mark.parametrize('media_type', [ARROW, ARROW_FILE])
+def test_read_arrow_bodies(media_type):
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table(columns())
+    sink = pa.BufferOutputStream()
+    new_writer = pa.ipc.new_file if media_type == ARROW_FILE else pa.ipc.new_stream
+    with new_writer(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post("/decode", content=sink.getvalue().to_pybytes(), headers={'Content-Type': media_type})
+    assert response.status_code == 200
+    assert response.json() == columns()
+
+
+def test_undecodable_body_is_a_400():
+    response = client.post("/decode", content=b'not arrow', headers={'Content-Type': ARROW})
+    assert response.status_code == 400
+
+
+def test_unknown_content_type_is_a_415():
+    response = client.post("/decode", content=b'a,b', headers={'Content-Type': 'text/csv'})
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, JSON),
+    (MSGPACK, MSGPACK),
+    (f"{MSGPACK};q=0.1, {JSON}", JSON),
+    (f"{JSON};q=0.5, {ARROW};q=0.9", ARROW),
+    (f"{ARROW};q=0, {MSGPACK}", MSGPACK),
+    (ARROW_FILE, JSON),
+    ('text/html', JSON)
+])
+def test_negotiate_honours_q_values(accept, expected):
+    pytest.importorskip('msgpack')
+    pytest.importorskip('pyarrow')
+    headers = {'Accept': accept} if accept is not None else {}
+    assert client.get("/negotiate", headers=headers).json() == {'media_type': expected}
@@ -0,0 +1,60 @@
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.prediction_log import PredictionLog
+from src.schema import FEATURE_COLUMNS
+
+
+def frame(n):
+    return pd.DataFrame({field: np.arange(n) + i for i, field in enumerate(FEATURE_COLUMNS)})
+
+
+def logged(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT model, new_index, prediction, probability, batch_rows FROM predictions").fetchall()
+
+
+def test_rows_are_written_by_stop(tmp_path):
+    path = str(tmp_path / 'predictions.db')
+    log = PredictionLog(path=path, enabled=True, batch_rows=1000, flush_seconds=60)
+    log.start()
+    log.record('xgb', frame(3), np.array([0, 1, 0]), np.array([0.1, 0.9, 0.2]), 1.5)
+    log.record('stacked', frame(1), 1, 0.7, 2.0)
+    log.stop()
+
+    rows = logged(path)
+    assert len(rows) == 4
+    assert rows[:3] == [('xgb', i + 2, int(i == 1), p, 3) for i, p in enumerate([0.1, 0.9, 0.2])]
+    assert rows[3] == ('stacked', 2, 1, 0.7, 1)
+    assert log.stats()['pending_rows'] == 0
+
+
+def test_rows_are_flushed_within_the_flush_interval(tmp_path):
+    path = str(tmp_path / 'predictions.db')
+    log = PredictionLog(path=path, enabled=True, batch_rows=1000, flush_seconds=0.2)
+    log.start()
+    try:
+        log.record('xgb', frame(2), np.array([0, 0]), np.array([0.1, 0.2]), 1.0)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and log.stats()['rows_logged'] < 2:
+            time.sleep(0.05)
+        # Readable while the writer is still running
+        assert len(logged(path)) == 2
+    finally:
+        log.stop()
+
+
+def test_batches_over_the_row_bound_are_dropped(tmp_path):
+    path = str(tmp_path / 'predictions.db')
+    log = PredictionLog(path=path, enabled=True, flush_seconds=60, queue_rows=5)
+    log.start()
+    log.record('xgb', frame(4), np.zeros(4), np.zeros(4), 1.0)
+    log.record('xgb', frame(2), np.zeros(2), np.zeros(2), 1.0)
+    log.stop()
+
+    stats = log.stats()
+    assert (stats['rows_logged'], stats['dropped_requests'], stats['dropped_rows']) == (4, 1, 2)
+    assert len(logged(path)) == 4
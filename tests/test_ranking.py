@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ranking import rank_clients
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    from benchmarks.steg_data import generate_chunk
+    from src.client_store import ClientStore, ingest
+
+    root = tmp_path_factory.mktemp('population')
+    clients, invoices = generate_chunk(0, 0, 300, seed=7, invoices_per_client=5)
+    clients.to_pandas().to_csv(root / 'clients.csv', index=False)
+    invoices.to_pandas().to_csv(root / 'invoices.csv', index=False)
+    ingest(str(root / 'clients.csv'), str(root / 'invoices.csv'), str(root / 'store'), n_buckets=8, chunk_rows=400)
+    return ClientStore(str(root / 'store'))
+
+
+def score(features):
+    """Row-wise stand-in for a model: a squashed weighted sum of the features."""
+    x = np.log1p(np.abs(features.to_numpy(dtype=float)))
+    return 1 / (1 + np.exp(-(x @ np.linspace(-1.0, 1.0, x.shape[1]))))
+
+
+def brute_force(store, k, **filters):
+    """Score every invoice at once and rank clients by their highest probability."""
+    from src.ranking import RAW_COLUMNS, _features
+
+    merged = pd.concat(store.scan_merged(columns=RAW_COLUMNS), ignore_index=True)
+    for column, values in filters.items():
+        merged = merged[merged[column].isin(values)]
+    merged = merged.assign(probability=score(_features(merged)))
+    best = merged.groupby('client_id')['probability'].max().reset_index()
+    best = best.sort_values(['probability', 'client_id'], ascending=False).head(k)
+    return list(best['client_id']), merged['client_id'].nunique()
+
+
+@pytest.mark.parametrize('k', [1, 10, 1000])
+def test_heap_keeps_the_k_riskiest_clients(store, k):
+    expected, n_clients = brute_force(store, k)
+    result = rank_clients(None, store, k, score=score)
+    assert [client['client_id'] for client in result['clients']] == expected
+    assert [client['rank'] for client in result['clients']] == list(range(1, len(expected) + 1))
+    assert result['clients_scanned'] == n_clients
+
+
+def test_filters_are_applied_before_ranking(store):
+    region = sorted({client['region'] for client in rank_clients(None, store, 1000, score=score)['clients']})[:2]
+    expected, _ = brute_force(store, 20, region=region, client_catg=[11])
+    result = rank_clients(None, store, 20, region=region, client_catg=[11], score=score)
+    assert [client['client_id'] for client in result['clients']] == expected
+    assert all(client['region'] in region and client['client_catg'] == 11 for client in result['clients'])
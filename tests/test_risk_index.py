@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from src.risk_index import RiskIndex, build, count_csv
+
+
+def write_clients(path, ids, seed=0):
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        'client_id': [f"client_{i}" for i in ids],
+        'target': [i % 7 == 0 for i in ids],
+        'region': rng.choice([101, 104, 311], len(ids)),
+        'disrict': rng.choice([60, 62, 69], len(ids)),
+        'client_catg': rng.choice([11, 12, 51], len(ids))
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def write_invoices(path, ids):
+    rows = [(f"client_{i}", counter_type) for i in ids for counter_type in ('ELEC', 'GAZ')[:1 + i % 2]]
+    pd.DataFrame(rows, columns=['client_id', 'counter_type']).to_csv(path, index=False)
+    return str(path)
+
+
+def test_incremental_refreshes_match_a_full_rebuild(tmp_path):
+    # The two files overlap on clients 60-79, whose rows are identical
+    ids = range(100)
+    invoices = write_invoices(tmp_path / 'invoices.csv', ids)
+    full_clients = write_clients(tmp_path / 'all.csv', ids)
+    full = pd.read_csv(full_clients)
+    full.iloc[:80].to_csv(tmp_path / 'first.csv', index=False)
+    full.iloc[60:].to_csv(tmp_path / 'second.csv', index=False)
+
+    full_index, _ = build(full_clients, invoices, str(tmp_path / 'full.json'))
+
+    index_path = str(tmp_path / 'incremental.json')
+    index, skipped = build(str(tmp_path / 'first.csv'), invoices, index_path)
+    assert skipped == 0
+    index, skipped = build(str(tmp_path / 'second.csv'), invoices, index_path, update=True)
+    assert skipped == 20
+    # Re-running the same refresh adds nothing
+    index, skipped = build(str(tmp_path / 'second.csv'), invoices, index_path, update=True)
+    assert skipped == 40
+
+    assert index.counts == full_index.counts
+    assert index.counts['_total']['all'] == [100, int(full['target'].sum())]
+    assert index.entries == full_index.entries
+
+
+def test_repeated_rows_in_one_file_are_counted_once(tmp_path):
+    clients = write_clients(tmp_path / 'clients.csv', list(range(10)) + [3, 3])
+    counts, client_ids, skipped = count_csv(clients)
+    assert (counts['_total']['all'][0], len(client_ids), skipped) == (10, 10, 2)
+
+
+def test_saved_index_round_trips(tmp_path):
+    ids = range(30)
+    index, _ = build(write_clients(tmp_path / 'clients.csv', ids), write_invoices(tmp_path / 'invoices.csv', ids),
+                     str(tmp_path / 'index.json'))
+    loaded = RiskIndex.load(str(tmp_path / 'index.json'))
+    assert loaded.entries == index.entries
+    assert loaded.lookup('counter_type', 'elec') == index.entries['counter_type']['ELEC']
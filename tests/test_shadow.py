@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src import registry
+from src.admission import admission
+from src.schema import FEATURE_COLUMNS
+from src.shadow import ShadowScorer
+
+
+def frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({field: rng.integers(1, 13, n) for field in FEATURE_COLUMNS})
+
+
+@pytest.fixture(autouse=True)
+def models():
+    df = frame(200)
+    previous = {name: registry.get_model(name) for name in ('xgb', 'stacked')}
+    for i, name in enumerate(('xgb', 'stacked')):
+        target = (df['new_index'] > 6 + i).astype(int)
+        registry.register(name, LogisticRegression().fit(df, target))
+    yield
+    for name, model in previous.items():
+        registry.register(name, model)
+
+
+def scored(scorer, pair='xgb->stacked', timeout=10):
+    """Rows scored for `pair` once the scorer's queue has drained."""
+    deadline = time.monotonic() + timeout
+    while scorer.pending_rows and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return scorer.summary()['pairs'].get(pair, {}).get('scored', 0)
+
+
+def test_batches_are_scored_on_the_secondary_model():
+    scorer = ShadowScorer(enabled=True)
+    scorer.submit('xgb', frame(100), np.full(100, 0.5))
+    assert scored(scorer) == 100
+
+
+def test_empty_batches_are_ignored():
+    scorer = ShadowScorer(enabled=True)
+    scorer.submit('xgb', frame(0), np.zeros(0))
+    summary = scorer.summary()
+    assert (summary['submitted'], summary['errors'], summary['queue_depth']) == (0, 0, 0)
+
+
+def test_large_batches_are_subsampled():
+    scorer = ShadowScorer(enabled=True, max_batch_rows=40)
+    scorer.submit('xgb', frame(100), np.full(100, 0.5))
+    assert scored(scorer) == 40
+
+
+def test_batches_over_the_row_bound_are_dropped():
+    scorer = ShadowScorer(enabled=True, queue_rows=50)
+    scorer.submit('xgb', frame(100), np.full(100, 0.5))
+    assert scorer.summary()['dropped_full'] == 1
+    assert scored(scorer) == 0
+
+
+def test_work_is_dropped_while_admission_is_saturated():
+    scorer = ShadowScorer(enabled=True)
+    admission['stacked'].waiting += 1
+    try:
+        scorer.submit('xgb', frame(10), np.full(10, 0.5))
+    finally:
+        admission['stacked'].waiting -= 1
+    assert scorer.summary()['dropped_busy'] == 1
+    assert scored(scorer) == 0
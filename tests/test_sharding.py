@@ -0,0 +1,65 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.schema import FEATURE_COLUMNS
+from src.scoring import predict_frame
+from src.sharding import ShardedScorer
+
+
+def frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({field: rng.integers(1, 13, n) for field in FEATURE_COLUMNS})
+
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory):
+    df = frame(500)
+    target = (df['new_index'] + df['creation_month'] > 13).astype(int)
+    model = Pipeline([('scaler', StandardScaler()), ('model', LogisticRegression())]).fit(df, target)
+    path = tmp_path_factory.mktemp('models') / 'model.joblib'
+    joblib.dump(model, path)
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def scorer(model_path):
+    scorer = ShardedScorer(processes=2, shard_rows=97, min_rows=100)
+    scorer.start({'test': model_path})
+    yield scorer
+    scorer.stop()
+
+
+@pytest.mark.parametrize('n_rows', [100, 1000, 1234])
+def test_sharded_scores_equal_in_process_scores(scorer, model_path, n_rows, caplog):
+    model = joblib.load(model_path)
+    df = frame(n_rows, seed=n_rows)
+    pred, proba = scorer.predict('test', model, df)
+    # Scored by the workers, not by the in-process fallback
+    assert 'Sharded scoring failed' not in caplog.text
+    expected_pred, expected_proba = predict_frame(model, df)
+    np.testing.assert_array_equal(pred, expected_pred)
+    np.testing.assert_allclose(proba, expected_proba, rtol=0, atol=1e-12)
+
+
+def test_small_batches_and_unknown_models_score_in_process(scorer, model_path):
+    model = joblib.load(model_path)
+    for name, df in (('test', frame(99)), ('other', frame(500))):
+        _, proba = scorer.predict(name, model, df)
+        np.testing.assert_array_equal(proba, predict_frame(model, df)[1])
+
+
+def test_models_the_workers_cannot_load_are_reported(model_path):
+    scorer = ShardedScorer(processes=1, shard_rows=97, min_rows=100)
+    scorer.start({'test': model_path, 'missing': model_path + '.missing'})
+    try:
+        errors = scorer.wait_ready(timeout=60)
+        assert list(errors) == ['missing']
+        # Scored in-process from now on, without a round trip to the workers
+        assert list(scorer.model_paths) == ['test']
+    finally:
+        scorer.stop()
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+
+from src import registry
+from src.schema import FEATURE_COLUMNS
+from src.streaming import router
+
+
+@pytest.fixture
+def client():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({field: rng.integers(1, 13, 200) for field in FEATURE_COLUMNS})
+    previous = registry.get_model('xgb')
+    registry.register('xgb', LogisticRegression().fit(df, (df['new_index'] > 6).astype(int)))
+    app = FastAPI()
+    app.include_router(router)
+    yield TestClient(app)
+    registry.register('xgb', previous)
+
+
+def test_binary_frames_are_rejected_without_closing_the_stream(client):
+    with client.websocket_connect('/stream/xgb') as ws:
+        ws.send_bytes(b'\x00\x01')
+        assert ws.receive_json()['type'] == 'error'
+        ws.send_json({'id': 'a', **{field: 1 for field in FEATURE_COLUMNS}})
+        reply = ws.receive_json()
+        assert (reply['type'], reply['ids']) == ('scores', ['a'])
+
+
+def test_control_messages_are_not_scored(client):
+    with client.websocket_connect('/stream/xgb') as ws:
+        ws.send_json({'type': 'stats'})
+        reply = ws.receive_json()
+        assert (reply['type'], reply['received']) == ('stats', 0)
+        ws.send_json({'type': 'nope'})
+        assert ws.receive_json() == {'type': 'error', 'detail': "Unknown message type 'nope'"}
+        ws.send_json({'type': 'stats'})
+        assert ws.receive_json()['received'] == 0
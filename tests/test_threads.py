@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+from threadpoolctl import threadpool_info
+
+from src import threads
+
+
+def openmp_threads():
+    return {pool['num_threads'] for pool in threadpool_info() if pool['user_api'] == 'openmp'}
+
+
+@pytest.fixture
+def native_limit(monkeypatch):
+    pytest.importorskip('xgboost')
+    monkeypatch.setenv('NATIVE_THREADS', '3')
+    monkeypatch.setattr(threads, '_native_pools', None)
+    monkeypatch.setattr(threads, '_native_limit', None)
+    return threads.limit_native_threads()
+
+
+def test_limit_applies_in_the_thread_that_runs_inference(native_limit):
+    if not openmp_threads():
+        pytest.skip("no OpenMP runtime loaded")
+    seen = {}
+
+    def infer():
+        seen['outside'] = openmp_threads()
+        with threads.native_threads():
+            seen['inside'] = openmp_threads()
+
+    # Set up in this thread, applied in another, like the API's threadpool workers
+    worker = threading.Thread(target=infer)
+    worker.start()
+    worker.join()
+    assert seen['inside'] == {native_limit}
+    assert seen['outside'] != {native_limit}
+
+
+def test_no_limit_before_setup(monkeypatch):
+    monkeypatch.setattr(threads, '_native_pools', None)
+    with threads.native_threads():
+        pass